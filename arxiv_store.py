@@ -0,0 +1,91 @@
+"""Local store of arXiv paper metadata and extracted sections, keyed by arXiv ID and version."""
+import json
+import re
+import sqlite3
+import time
+from pathlib import Path
+from typing import Optional
+
+from config import get_config
+
+# 2404.04365v2, arXiv:2404.04365, hep-th/9901001v1
+_ARXIV_ID_RE = re.compile(r"(\d{4}\.\d{4,5}|[a-z\-]+(?:\.[A-Z]{2})?/\d{7})(v\d+)?")
+
+
+def parse_arxiv_id(value: str) -> Optional[tuple]:
+    """Return (arxiv_id, version) from an ID or arXiv URL; version is "" when unspecified."""
+    match = _ARXIV_ID_RE.search(value)
+    if not match:
+        return None
+    return match.group(1), match.group(2) or ""
+
+
+class ArxivStore:
+    """SQLite-backed metadata and section store shared by threads and worker processes."""
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path or get_config().ARXIV_STORE_PATH)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS papers ("
+                "arxiv_id TEXT, version TEXT, metadata TEXT, fetched_at REAL, "
+                "PRIMARY KEY (arxiv_id, version))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sections ("
+                "arxiv_id TEXT, version TEXT, sections TEXT, fetched_at REAL, "
+                "PRIMARY KEY (arxiv_id, version))"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def put_metadata(self, record: dict):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO papers VALUES (?, ?, ?, ?)",
+                (record["arxiv_id"], record["version"], json.dumps(record), time.time()),
+            )
+
+    def get_metadata(self, arxiv_id: str, version: str = "") -> Optional[dict]:
+        """Return metadata for a specific version, or the latest stored version when unspecified."""
+        with self._connect() as conn:
+            if version:
+                row = conn.execute(
+                    "SELECT metadata FROM papers WHERE arxiv_id = ? AND version = ?", (arxiv_id, version)
+                ).fetchone()
+            else:
+                row = conn.execute(
+                    "SELECT metadata FROM papers WHERE arxiv_id = ? "
+                    "ORDER BY CAST(SUBSTR(version, 2) AS INTEGER) DESC LIMIT 1", (arxiv_id,)
+                ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put_sections(self, arxiv_id: str, version: str, sections: list):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO sections VALUES (?, ?, ?, ?)",
+                (arxiv_id, version, json.dumps(sections), time.time()),
+            )
+
+    def get_sections(self, arxiv_id: str, version: str = "") -> Optional[list]:
+        """Return [[heading, text], ...] extracted from the paper's full text, if stored."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT sections FROM sections WHERE arxiv_id = ? AND version = ?", (arxiv_id, version)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+
+_store = None
+
+
+def get_arxiv_store() -> ArxivStore:
+    """Return the shared arXiv store for the configured path."""
+    global _store
+    path = Path(get_config().ARXIV_STORE_PATH)
+    if _store is None or _store.path != path:
+        _store = ArxivStore(path)
+    return _store
@@ -0,0 +1,202 @@
+"""Gemini Batch API backend that groups LLM calls from many concurrent workflows into batch jobs."""
+import contextvars
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from typing import Optional
+
+import requests
+
+from config import get_config
+from scheduler import scheduled
+
+_active_batch = contextvars.ContextVar("active_batch", default=None)
+
+_SUCCEEDED_STATES = ("BATCH_STATE_SUCCEEDED", "JOB_STATE_SUCCEEDED")
+_FAILED_STATES = (
+    "BATCH_STATE_FAILED", "BATCH_STATE_CANCELLED", "BATCH_STATE_EXPIRED",
+    "JOB_STATE_FAILED", "JOB_STATE_CANCELLED", "JOB_STATE_EXPIRED",
+)
+
+
+class BatchJobError(Exception):
+    """Raised for requests whose batch job failed, expired or returned no response for them."""
+    pass
+
+
+def active_batch() -> Optional['BatchCollector']:
+    """Return the batch collector LLM calls in this context should go through, if any."""
+    return _active_batch.get()
+
+
+class BatchCollector:
+    """
+    Collect generateContent requests from many workflow threads and submit them as batch jobs.
+
+    While the collector is active (``with BatchCollector():``), generate_response
+    hands its request to submit() and blocks on the returned future, so every
+    workflow thread simply pauses until its batch completes. Pending requests
+    are flushed as one job per model when BATCH_MAX_REQUESTS are waiting, when
+    every workflow announced with expect() is waiting on a request, or
+    BATCH_FLUSH_SECONDS after the oldest pending request. Jobs are polled every BATCH_POLL_SECONDS
+    until they finish and each result is handed back to its waiting workflow.
+    """
+
+    def __init__(self, max_requests: Optional[int] = None, flush_seconds: Optional[float] = None,
+                 poll_seconds: Optional[float] = None, max_wait_seconds: Optional[float] = None):
+        config = get_config()
+        self.api_base = config.GEMINI_API_BASE
+        self.api_key = config.GEMINI_API_KEY
+        self.max_requests = max_requests or config.BATCH_MAX_REQUESTS
+        self.flush_seconds = config.BATCH_FLUSH_SECONDS if flush_seconds is None else flush_seconds
+        self.poll_seconds = config.BATCH_POLL_SECONDS if poll_seconds is None else poll_seconds
+        self.max_wait_seconds = max_wait_seconds or config.BATCH_MAX_WAIT_SECONDS
+        self.jobs = []
+        self._pending = []
+        self._first_pending_at = None
+        self._participants = 0
+        self._closed = False
+        self._condition = threading.Condition()
+        self._flusher = threading.Thread(target=self._flush_loop, name="batch-flush", daemon=True)
+        self._token = None
+
+    def __enter__(self):
+        self._token = _active_batch.set(self)
+        self._flusher.start()
+        return self
+
+    def __exit__(self, *exc):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._flusher.join()
+        _active_batch.reset(self._token)
+        return False
+
+    def expect(self, count: int = 1):
+        """Announce workflows that will submit requests (used to flush once all of them are waiting)."""
+        with self._condition:
+            self._participants += count
+
+    def done(self):
+        """Mark one announced workflow as finished."""
+        with self._condition:
+            self._participants -= 1
+            self._condition.notify_all()
+
+    def submit(self, model: str, payload: dict) -> Future:
+        """Queue one generateContent request; the future resolves to its response JSON."""
+        future = Future()
+        with self._condition:
+            if self._closed:
+                raise BatchJobError("Batch collector is closed")
+            if not self._pending:
+                self._first_pending_at = time.monotonic()
+            self._pending.append((uuid.uuid4().hex, model, payload, future))
+            self._condition.notify_all()
+        return future
+
+    def _should_flush(self) -> bool:
+        if not self._pending:
+            return False
+        return (
+            self._closed
+            or len(self._pending) >= self.max_requests
+            or len(self._pending) >= self._participants
+            or time.monotonic() - self._first_pending_at >= self.flush_seconds
+        )
+
+    def _flush_loop(self):
+        while True:
+            with self._condition:
+                while not self._should_flush():
+                    if self._closed and not self._pending:
+                        return
+                    timeout = None
+                    if self._pending:
+                        timeout = max(self.flush_seconds - (time.monotonic() - self._first_pending_at), 0.01)
+                    self._condition.wait(timeout)
+                batch = self._pending[:self.max_requests]
+                del self._pending[:self.max_requests]
+                self._first_pending_at = time.monotonic() if self._pending else None
+
+            by_model = {}
+            for request in batch:
+                by_model.setdefault(request[1], []).append(request)
+            # Poll jobs in the background so new requests keep being collected meanwhile
+            for model, model_requests in by_model.items():
+                threading.Thread(
+                    target=self._run_job, args=(model, model_requests), name="batch-job", daemon=True
+                ).start()
+
+    def _run_job(self, model: str, batch: list):
+        try:
+            name = self._create_job(model, batch)
+            responses = self._wait_for_job(name)
+        except Exception as e:
+            for _, _, _, future in batch:
+                future.set_exception(BatchJobError(f"Batch job failed: {str(e)}"))
+            return
+
+        for index, (key, _, _, future) in enumerate(batch):
+            # Results carry the request key; fall back to input order if the service drops it
+            item = responses.get(key) or responses.get(index)
+            if item is None:
+                future.set_exception(BatchJobError(f"No response for request {key} in {name}"))
+            elif "error" in item:
+                future.set_exception(BatchJobError(f"Request {key} failed in {name}: {item['error']}"))
+            else:
+                future.set_result(item["response"])
+
+    def _create_job(self, model: str, batch: list) -> str:
+        url = f"{self.api_base}/models/{model}:batchGenerateContent?key={self.api_key}"
+        body = {
+            "batch": {
+                "display_name": f"research-agent-{uuid.uuid4().hex[:8]}",
+                "input_config": {
+                    "requests": {
+                        "requests": [
+                            {"request": payload, "metadata": {"key": key}} for key, _, payload, _ in batch
+                        ]
+                    }
+                },
+            }
+        }
+        # Job creation and polling share upstream capacity with interactive runs in every process
+        with scheduled("llm", priority="batch"):
+            response = requests.post(url=url, headers={"Content-Type": "application/json"}, json=body)
+        response.raise_for_status()
+        name = response.json()["name"]
+        self.jobs.append(name)
+        print(f"Submitted batch job {name} with {len(batch)} requests")
+        return name
+
+    def _wait_for_job(self, name: str) -> dict:
+        """Poll until the job finishes; returns responses keyed by request key and by index."""
+        deadline = time.monotonic() + self.max_wait_seconds
+        while True:
+            with scheduled("llm", priority="batch"):
+                response = requests.get(url=f"{self.api_base}/{name}?key={self.api_key}")
+            response.raise_for_status()
+            operation = response.json()
+            state = operation.get("metadata", {}).get("state", "")
+            if state in _FAILED_STATES or "error" in operation:
+                raise BatchJobError(f"{name} ended in {state or operation.get('error')}")
+            if operation.get("done") or state in _SUCCEEDED_STATES:
+                return _inlined_responses(operation)
+            if time.monotonic() >= deadline:
+                raise BatchJobError(f"{name} did not finish within {self.max_wait_seconds:.0f}s")
+            time.sleep(self.poll_seconds)
+
+
+def _inlined_responses(operation: dict) -> dict:
+    output = operation.get("response") or operation.get("metadata", {}).get("output") or {}
+    items = output.get("inlinedResponses", {}).get("inlinedResponses", [])
+    responses = {}
+    for index, item in enumerate(items):
+        responses[index] = item
+        key = item.get("metadata", {}).get("key")
+        if key:
+            responses[key] = item
+    return responses
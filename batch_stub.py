@@ -0,0 +1,117 @@
+"""Local stand-in for the Gemini Batch API, for exercising the batch backend offline.
+
+Serves ``models/{model}:batchGenerateContent`` and ``batches/{id}`` under
+``/v1beta``. Jobs succeed after --delay seconds. Each request is answered
+from an LLM record/replay directory when it holds a matching response, and
+with --text otherwise.
+
+    python batch_stub.py --port 8765 --replay-dir .llm_cache
+    GEMINI_API_BASE=http://127.0.0.1:8765/v1beta python worker.py batch
+"""
+import argparse
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+from llm_cache import ResponseRecorder, payload_key
+
+
+class BatchStub:
+    """In-memory batch jobs answered from recorded responses or a fixed text."""
+
+    def __init__(self, delay: float = 1.0, text: str = "stub response", replay_dir: Optional[str] = None):
+        self.delay = delay
+        self.text = text
+        self.recorder = ResponseRecorder("replay", replay_dir) if replay_dir else None
+        self.jobs = {}
+        self._lock = threading.Lock()
+
+    def create(self, model: str, body: dict) -> dict:
+        name = f"batches/{uuid.uuid4().hex[:12]}"
+        requests = body["batch"]["input_config"]["requests"]["requests"]
+        with self._lock:
+            self.jobs[name] = {"model": model, "requests": requests, "created_at": time.monotonic()}
+        return {"name": name, "metadata": {"state": "BATCH_STATE_PENDING"}}
+
+    def get(self, name: str) -> Optional[dict]:
+        with self._lock:
+            job = self.jobs.get(name)
+        if job is None:
+            return None
+        if time.monotonic() - job["created_at"] < self.delay:
+            return {"name": name, "metadata": {"state": "BATCH_STATE_RUNNING"}, "done": False}
+        responses = [
+            {"response": self._answer(job["model"], item["request"]), "metadata": item.get("metadata", {})}
+            for item in job["requests"]
+        ]
+        return {
+            "name": name,
+            "metadata": {"state": "BATCH_STATE_SUCCEEDED"},
+            "done": True,
+            "response": {"inlinedResponses": {"inlinedResponses": responses}},
+        }
+
+    def _answer(self, model: str, request: dict) -> dict:
+        if self.recorder:
+            recorded = self.recorder.lookup(payload_key(model, request))
+            if recorded is not None:
+                return recorded
+        return {
+            "candidates": [{"content": {"role": "model", "parts": [{"text": self.text}]}}],
+            "usageMetadata": {"promptTokenCount": 0, "candidatesTokenCount": 0, "totalTokenCount": 0},
+        }
+
+
+def make_handler(stub: BatchStub):
+    class Handler(BaseHTTPRequestHandler):
+        def _send_json(self, status: int, data: dict):
+            body = json.dumps(data).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            path = self.path.split("?")[0]
+            if not path.endswith(":batchGenerateContent") or "/models/" not in path:
+                self._send_json(404, {"error": {"message": "Not found"}})
+                return
+            model = path.split("/models/", 1)[1].split(":", 1)[0]
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            self._send_json(200, stub.create(model, body))
+
+        def do_GET(self):
+            path = self.path.split("?")[0]
+            name = "batches/" + path.split("/batches/", 1)[1] if "/batches/" in path else ""
+            operation = stub.get(name)
+            if operation is None:
+                self._send_json(404, {"error": {"message": f"Unknown batch {name}"}})
+                return
+            self._send_json(200, operation)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Gemini Batch API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=1.0, help="Seconds before a job succeeds")
+    parser.add_argument("--text", default="stub response", help="Answer for requests with no recording")
+    parser.add_argument("--replay-dir", help="LLM record/replay directory to answer from")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(BatchStub(args.delay, args.text, args.replay_dir)))
+    print(f"Batch stand-in on http://{args.host}:{args.port}/v1beta")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
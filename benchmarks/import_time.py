@@ -0,0 +1,76 @@
+"""Startup-time budget for CLI and worker entry points.
+
+Runs ``python -X importtime`` on each entry module in a fresh interpreter
+and fails (exit code 1) if the cumulative import time exceeds the budget or
+if a heavy dependency that should load lazily is imported at startup.
+
+Usage:
+    python benchmarks/import_time.py [--budget-ms 400] [--repeat 3] [module ...]
+"""
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+DEFAULT_MODULES = ("main", "worker")
+
+# Must only be imported on first use
+LAZY_MODULES = ("fitz", "bs4", "streamlit")
+
+
+def measure(module: str) -> tuple:
+    """Return (cumulative import time in ms, lazily-loaded modules that were imported anyway)."""
+    code = (
+        f"import {module}, sys; "
+        f"print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=REPO_ROOT, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    cumulative_us = None
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:"):
+            continue
+        fields = [f.strip() for f in line.split(":", 1)[1].split("|")]
+        if len(fields) == 3 and fields[2] == module and fields[1].isdigit():
+            cumulative_us = int(fields[1])
+    if cumulative_us is None:
+        raise RuntimeError(f"No importtime entry found for {module}")
+
+    eager = [m for m in result.stdout.strip().split(",") if m]
+    return cumulative_us / 1000, eager
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("modules", nargs="*", default=list(DEFAULT_MODULES))
+    parser.add_argument("--budget-ms", type=float, default=400)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per module; the fastest counts")
+    args = parser.parse_args()
+
+    failed = False
+    for module in args.modules:
+        runs = [measure(module) for _ in range(args.repeat)]
+        best_ms = min(ms for ms, _ in runs)
+        eager = runs[0][1]
+        status = "ok"
+        if best_ms > args.budget_ms:
+            status = f"OVER BUDGET ({args.budget_ms:.0f} ms)"
+            failed = True
+        if eager:
+            status += f", eagerly imports {', '.join(eager)}"
+            failed = True
+        print(f"{module:<10} {best_ms:8.1f} ms  {status}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""Micro-benchmark for request-body encoding in the tool-calling loop.
+
+Simulates one angle's conversation growing turn by turn with large tool
+results and encodes the full generateContent payload on every turn, once the
+way requests does for ``json=`` (re-serializing the whole history) and once
+through conversation.Conversation (cached per-message fragments, orjson when
+installed).
+
+Usage:
+    python benchmarks/serialization.py [--turns 20] [--result-kb 40] [--calls-per-turn 2] [--repeat 5]
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from conversation import Conversation, encode_request, orjson  # noqa: E402
+
+TOOLS = [{"name": f"tool_{i}", "description": "x" * 200, "parameters": {"type": "object"}} for i in range(5)]
+
+
+def build_turns(turns: int, result_kb: int, calls_per_turn: int) -> list:
+    """Messages appended per turn: the model's function calls, then the tool results."""
+    result = ("Lorem ipsum dolor sit amet, ünïcödé \"quoted\" text.\n" * (result_kb * 20))[:result_kb * 1024]
+    history = []
+    for turn in range(turns):
+        calls = [{"functionCall": {"name": "fetch_url", "args": {"url": f"https://example.com/{turn}/{i}"}}}
+                 for i in range(calls_per_turn)]
+        responses = [{"functionResponse": {"name": "fetch_url", "response": {"result": result}}}
+                     for _ in range(calls_per_turn)]
+        history.append(({"role": "model", "parts": calls}, {"role": "user", "parts": responses}))
+    return history
+
+
+def make_payload(contents) -> dict:
+    return {
+        "contents": contents,
+        "generationConfig": {"thinkingConfig": {"thinkingLevel": "medium"}},
+        "tools": [{"functionDeclarations": TOOLS}],
+    }
+
+
+def run_baseline(history: list) -> tuple:
+    # What requests does for json=payload: json.dumps of the whole body, then UTF-8 encode
+    messages = [{"role": "user", "parts": [{"text": "prompt"}]}]
+    total_bytes = 0
+    started = time.perf_counter()
+    for model_message, tool_message in history:
+        body = json.dumps(make_payload(messages), allow_nan=False).encode("utf-8")
+        total_bytes += len(body)
+        messages.append(model_message)
+        messages.append(tool_message)
+    return time.perf_counter() - started, total_bytes
+
+
+def run_conversation(history: list) -> tuple:
+    messages = Conversation([{"role": "user", "parts": [{"text": "prompt"}]}])
+    total_bytes = 0
+    started = time.perf_counter()
+    for model_message, tool_message in history:
+        body = encode_request(make_payload(messages))
+        total_bytes += len(body)
+        messages.append(model_message)
+        messages.append(tool_message)
+    return time.perf_counter() - started, total_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--result-kb", type=int, default=40)
+    parser.add_argument("--calls-per-turn", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    history = build_turns(args.turns, args.result_kb, args.calls_per_turn)
+    # Both paths must send the same document
+    baseline_body = json.loads(json.dumps(make_payload([m for pair in history for m in pair])))
+    cached_body = json.loads(encode_request(make_payload(Conversation([m for pair in history for m in pair]))))
+    assert baseline_body == cached_body, "encoded payloads differ"
+
+    encoder = "orjson" if orjson is not None else "json"
+    print(f"{args.turns} turns x {args.calls_per_turn} tool results of {args.result_kb} KB, best of {args.repeat}")
+    results = {}
+    for name, fn in (("json= (baseline)", run_baseline), (f"Conversation ({encoder})", run_conversation)):
+        best, total_bytes = min(fn(history) for _ in range(args.repeat))
+        results[name] = best
+        print(f"  {name:<24} {best * 1000:9.1f} ms  {total_bytes / 1e6:8.1f} MB encoded")
+    baseline, cached = results.values()
+    print(f"  speedup: {baseline / cached:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""Adaptive iteration, time and token budgets for the tool-calling loop."""
+import json
+import threading
+import time
+from typing import Optional
+
+from batch import active_batch
+from config import get_config
+
+# Tool results that carry no new information
+_EMPTY_RESULT_PREFIXES = ("No results found", "Error", "No content extracted", "Invalid arXiv URL")
+
+
+class RunBudget:
+    """
+    Global budget for one workflow run, divided dynamically across angles.
+
+    Each angle receives an equal share of whatever is left when it starts, so
+    angles that wrap up early leave more for the ones that follow. A limit
+    of 0 means unlimited. Wall-clock limits are off under the batch backend,
+    where a single LLM call waits for a whole batch job.
+    """
+
+    def __init__(self, max_seconds: Optional[float] = None, max_tokens: Optional[int] = None,
+                 max_iterations: Optional[int] = None):
+        config = get_config()
+        self.max_seconds = config.RUN_MAX_SECONDS if max_seconds is None else max_seconds
+        if active_batch():
+            self.max_seconds = 0
+        self.max_tokens = config.RUN_MAX_TOKENS if max_tokens is None else max_tokens
+        self.max_iterations = config.RUN_MAX_TOOL_ITERATIONS if max_iterations is None else max_iterations
+        self.started_at = time.monotonic()
+        self.tokens_used = 0
+        self.iterations_used = 0
+        self.pending_angles = 0
+        self.unfinished_angles = 0
+        self.cancelled = False
+        self._lock = threading.Lock()
+
+    def add_angles(self, count: int):
+        """Announce angles that will draw from this budget."""
+        with self._lock:
+            self.pending_angles += count
+
+    def charge(self, tokens: int = 0, iterations: int = 0):
+        with self._lock:
+            self.tokens_used += tokens
+            self.iterations_used += iterations
+
+    def record_unfinished_angle(self):
+        """Count an angle whose tool loop was cut short before the model finished on its own."""
+        with self._lock:
+            self.unfinished_angles += 1
+
+    def cancel(self):
+        """Stop every angle drawing from this budget at its next check."""
+        self.cancelled = True
+
+    def remaining_seconds(self) -> Optional[float]:
+        if not self.max_seconds:
+            return None
+        return self.max_seconds - (time.monotonic() - self.started_at)
+
+    def remaining_tokens(self) -> Optional[int]:
+        if not self.max_tokens:
+            return None
+        return self.max_tokens - self.tokens_used
+
+    def remaining_iterations(self) -> Optional[int]:
+        if not self.max_iterations:
+            return None
+        return self.max_iterations - self.iterations_used
+
+    def exhausted_reason(self) -> Optional[str]:
+        """Return why the run budget is used up, or None if there is budget left."""
+        if self.cancelled:
+            return "Run cancelled"
+        seconds = self.remaining_seconds()
+        if seconds is not None and seconds <= 0:
+            return f"Run time budget of {self.max_seconds}s exhausted"
+        tokens = self.remaining_tokens()
+        if tokens is not None and tokens <= 0:
+            return f"Run token budget of {self.max_tokens} exhausted"
+        iterations = self.remaining_iterations()
+        if iterations is not None and iterations <= 0:
+            return f"Run iteration budget of {self.max_iterations} exhausted"
+        return None
+
+    @property
+    def exhausted(self) -> bool:
+        return self.exhausted_reason() is not None
+
+    def allocate(self) -> 'AngleBudget':
+        """Create the budget for the next angle from an equal share of what is left."""
+        with self._lock:
+            share_of = max(self.pending_angles, 1)
+            self.pending_angles = max(self.pending_angles - 1, 0)
+
+        def share(remaining):
+            return None if remaining is None else max(remaining / share_of, 0)
+
+        iterations = share(self.remaining_iterations())
+        return AngleBudget(
+            run_budget=self,
+            max_seconds=share(self.remaining_seconds()),
+            max_tokens=share(self.remaining_tokens()),
+            max_iterations=None if iterations is None else max(int(iterations), 1),
+        )
+
+
+class AngleBudget:
+    """
+    Per-angle deadline and progress tracking for generate_response_with_fn_calls.
+
+    Stops the loop when the angle's wall-clock, token or iteration allowance
+    runs out, when the run budget is exhausted, or when several consecutive
+    turns make no progress (only repeated identical calls or empty results).
+    The wall-clock allowance is ignored under the batch backend, where one
+    turn takes as long as a batch job.
+    """
+
+    def __init__(self, run_budget: Optional[RunBudget] = None, max_seconds: Optional[float] = None,
+                 max_tokens: Optional[float] = None, max_iterations: Optional[int] = None):
+        config = get_config()
+        self.run_budget = run_budget
+        self.max_seconds = 0 if active_batch() else _min_limit(config.ANGLE_MAX_SECONDS, max_seconds)
+        self.max_tokens = _min_limit(config.ANGLE_MAX_TOKENS, max_tokens)
+        self.max_iterations = int(_min_limit(config.MAX_TOOL_ITERATIONS, max_iterations))
+        self.no_progress_limit = config.NO_PROGRESS_TURN_LIMIT
+        self.started_at = time.monotonic()
+        self.tokens_used = 0
+        self.iterations = 0
+        self.no_progress_turns = 0
+        self.unfinished = False
+        self._cancelled = False
+        self._seen_calls = set()
+
+    def cancel(self):
+        """Stop the angle at the loop's next check, without a final summary."""
+        self._cancelled = True
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled or bool(self.run_budget and self.run_budget.cancelled)
+
+    def record_response(self, response: dict):
+        """Account for one LLM call."""
+        tokens = response.get("usageMetadata", {}).get("totalTokenCount", 0)
+        self.tokens_used += tokens
+        self.iterations += 1
+        if self.run_budget:
+            self.run_budget.charge(tokens=tokens, iterations=1)
+
+    def record_unfinished(self):
+        """Note that the loop stopped before the model finished, so its summary was forced."""
+        self.unfinished = True
+        if self.run_budget:
+            self.run_budget.record_unfinished_angle()
+
+    def record_turn(self, calls: list):
+        """Track whether a tool turn of (name, args, result) calls produced anything new."""
+        progress = False
+        for name, args, result in calls:
+            signature = json.dumps([name, args], sort_keys=True)
+            repeated = signature in self._seen_calls
+            self._seen_calls.add(signature)
+
+            output = str(result).strip()
+            if not repeated and output and not output.startswith(_EMPTY_RESULT_PREFIXES):
+                progress = True
+
+        self.no_progress_turns = 0 if progress else self.no_progress_turns + 1
+
+    def stop_reason(self) -> Optional[str]:
+        """Return why the loop should wrap up now, or None to keep going."""
+        if self.cancelled:
+            return "Angle cancelled"
+        if self.max_seconds and time.monotonic() - self.started_at >= self.max_seconds:
+            return f"Angle time budget of {self.max_seconds:.0f}s exhausted"
+        if self.max_tokens and self.tokens_used >= self.max_tokens:
+            return f"Angle token budget of {self.max_tokens:.0f} exhausted"
+        if self.no_progress_limit and self.no_progress_turns >= self.no_progress_limit:
+            return f"No progress in the last {self.no_progress_turns} tool turns"
+        if self.run_budget:
+            return self.run_budget.exhausted_reason()
+        return None
+
+
+def _min_limit(*limits):
+    """Smallest of the given limits, treating None and 0 as unlimited (returns 0)."""
+    active = [limit for limit in limits if limit]
+    return min(active) if active else 0
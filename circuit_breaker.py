@@ -0,0 +1,108 @@
+"""Per-host circuit breaker and negative cache for document fetches."""
+import sqlite3
+import time
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlparse
+
+from config import get_config
+
+# Longest a half-open trial fetch may take before another caller gets to try
+_TRIAL_SECONDS = 120
+
+
+def url_host(url: str) -> str:
+    return (urlparse(url).hostname or "").lower()
+
+
+class HostCircuitBreaker:
+    """
+    Tracks consecutive fetch failures per host.
+
+    After failure_threshold consecutive failures the circuit opens and
+    fetches to that host are refused for cooldown_seconds. Once the
+    cool-down ends the circuit is half-open: the first fetch is let through
+    as the single trial while others stay refused, success closes the
+    circuit and another failure re-opens it. A trial that never reports back
+    (e.g. its process died) is given up after trial_seconds. State lives in
+    SQLite so all angles, runs and worker processes on the host share it.
+    """
+
+    def __init__(self, path: Optional[Path] = None, failure_threshold: Optional[int] = None,
+                 cooldown_seconds: Optional[float] = None):
+        config = get_config()
+        self.path = Path(path or config.CIRCUIT_BREAKER_PATH)
+        self.failure_threshold = failure_threshold or config.CIRCUIT_BREAKER_FAILURES
+        self.cooldown_seconds = cooldown_seconds or config.CIRCUIT_BREAKER_COOLDOWN_SECONDS
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS hosts ("
+                "host TEXT PRIMARY KEY, failures INTEGER NOT NULL, open_until REAL NOT NULL, last_error TEXT)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def check(self, url: str) -> Optional[str]:
+        """Return a short-circuit message if the URL's host is cooling down or on trial, else None."""
+        host = url_host(url)
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT failures, open_until, last_error FROM hosts WHERE host = ?", (host,)
+            ).fetchone()
+            if not row or row[0] < self.failure_threshold:
+                return None
+            if row[1] <= now:
+                # Half-open: only the caller that moves open_until forward runs the trial fetch
+                claimed = conn.execute(
+                    "UPDATE hosts SET open_until = ? WHERE host = ? AND open_until <= ?",
+                    (now + _TRIAL_SECONDS, host, now),
+                ).rowcount
+                if claimed:
+                    return None
+                row = conn.execute(
+                    "SELECT failures, open_until, last_error FROM hosts WHERE host = ?", (host,)
+                ).fetchone()
+                if not row:
+                    return None
+        failures, open_until, last_error = row
+        return (
+            f"Error fetching URL: skipped because {host} failed {failures} times recently "
+            f"(last error: {last_error}). It will be retried in {max(open_until - now, 0):.0f}s; "
+            f"use a source on a different site instead."
+        )
+
+    def record_success(self, url: str):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM hosts WHERE host = ?", (url_host(url),))
+
+    def record_failure(self, url: str, error: str):
+        host = url_host(url)
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO hosts (host, failures, open_until, last_error) VALUES (?, 1, 0, ?) "
+                "ON CONFLICT(host) DO UPDATE SET failures = failures + 1, last_error = excluded.last_error",
+                (host, error[:200]),
+            )
+            conn.execute(
+                "UPDATE hosts SET open_until = ? WHERE host = ? AND failures >= ?",
+                (now + self.cooldown_seconds, host, self.failure_threshold),
+            )
+
+
+_breaker = None
+
+
+def get_circuit_breaker() -> Optional[HostCircuitBreaker]:
+    """Return the shared circuit breaker, or None when disabled."""
+    global _breaker
+    config = get_config()
+    if not config.ENABLE_CIRCUIT_BREAKER:
+        return None
+    if _breaker is None or _breaker.path != Path(config.CIRCUIT_BREAKER_PATH):
+        _breaker = HostCircuitBreaker(config.CIRCUIT_BREAKER_PATH)
+    return _breaker
@@ -1,8 +1,28 @@
 """Configuration management with environment variable validation."""
+import contextlib
+import contextvars
+import copy
 import os
+import sys
 from typing import Optional
 from pathlib import Path
 
+_run_config = contextvars.ContextVar("run_config", default=None)
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    """Read a boolean flag from the environment."""
+    value = os.environ.get(name)
+    if value is None or not value.strip():
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _running_in_streamlit() -> bool:
+    """True inside the Streamlit app; checks loaded modules instead of importing streamlit."""
+    st = sys.modules.get('streamlit')
+    return st is not None and hasattr(st, 'secrets')
+
 
 class ConfigurationError(Exception):
     """Raised when required configuration is missing or invalid."""
@@ -19,10 +39,134 @@ class Config:
     # Model Configuration
     GEMINI_MODEL: str = "gemini-3-flash-preview"
     THINKING_LEVEL: str = "medium"
+    GEMINI_API_BASE: str = "https://generativelanguage.googleapis.com/v1beta"
 
     # Safety Limits
     MAX_TOOL_ITERATIONS: int = 20
 
+    # Adaptive Budgets (0 = unlimited)
+    RUN_MAX_SECONDS: float = 0
+    RUN_MAX_TOKENS: int = 0
+    RUN_MAX_TOOL_ITERATIONS: int = 0
+    ANGLE_MAX_SECONDS: float = 0
+    ANGLE_MAX_TOKENS: int = 0
+    NO_PROGRESS_TURN_LIMIT: int = 0
+
+    # Fused Planning (one call for understanding + plan when no clarification is needed)
+    FUSED_PLANNING: bool = False
+
+    # Speculative Research (plan and research on the assumptions while clarification is pending)
+    SPECULATIVE_RESEARCH: bool = False
+    SPECULATIVE_MAX_ANGLES: int = 3
+    SPECULATIVE_MAX_ITERATIONS: int = 6
+    SPECULATIVE_PLAN_SIMILARITY: float = 0.9
+    SPECULATIVE_ANGLE_SIMILARITY: float = 0.7
+
+    # Pipelined Planning (stream Phase 2 and start angles as they are planned)
+    PIPELINE_PLANNING: bool = False
+    PHASE_3_CONCURRENCY: int = 3
+
+    # Task Graph Scheduler (incremental reflection overlapping research; takes precedence over pipelining)
+    ENABLE_GRAPH_SCHEDULER: bool = False
+    GRAPH_MAX_GAP_ANGLES: int = 4
+
+    # Prompt Size Budgets for Reflection and Report Synthesis
+    REFLECTION_MAX_CHARS: int = 60000
+    REPORT_MAX_CHARS: int = 120000
+    REPORT_MAX_SOURCES: int = 80
+
+    # Context Caching
+    ENABLE_CONTEXT_CACHE: bool = False
+    CONTEXT_CACHE_MIN_TOKENS: int = 4096
+    CONTEXT_CACHE_TTL_SECONDS: int = 600
+
+    # LLM Record/Replay ("off", "record", "replay", "replay_or_record")
+    LLM_CACHE_MODE: str = "off"
+    LLM_CACHE_DIR: Path = Path(".llm_cache")
+
+    # Speculative Prefetch of Search Results
+    ENABLE_PREFETCH: bool = False
+    PREFETCH_TOP_N: int = 3
+    PREFETCH_MAX_DOCUMENTS: int = 30
+    PREFETCH_MAX_BYTES: int = 20_000_000
+    PREFETCH_WORKERS: int = 4
+    PREFETCH_WAIT_SECONDS: float = 60
+
+    # Webpage Fetch Strategy
+    FETCH_HEDGE_DELAY_SECONDS: float = 4.0
+    FETCH_ROUTES_PATH: Optional[Path] = Path(".fetch_routes.json")
+    FETCH_MAX_WORKERS: int = 8
+    JINA_TIMEOUT_SECONDS: float = 30
+    MAX_HTML_BYTES: int = 5_000_000
+    MAX_PDF_BYTES: int = 50_000_000
+
+    # Per-Host Circuit Breaker
+    ENABLE_CIRCUIT_BREAKER: bool = False
+    CIRCUIT_BREAKER_PATH: Path = Path(".fetch_state/hosts.db")
+    CIRCUIT_BREAKER_FAILURES: int = 3
+    CIRCUIT_BREAKER_COOLDOWN_SECONDS: float = 600
+
+    # Local Document Index
+    ENABLE_LOCAL_INDEX: bool = False
+    LOCAL_INDEX_PATH: Path = Path(".local_index/documents.db")
+    LOCAL_INDEX_MAX_AGE_DAYS: float = 30
+
+    # arXiv Metadata Store
+    ARXIV_STORE_PATH: Path = Path(".arxiv_store/papers.db")
+    ARXIV_ID_BATCH_SIZE: int = 100
+
+    # Search results: "markdown" or "text" also returns page content, served to later fetch_url calls
+    SEARCH_RAW_CONTENT: str = "off"
+
+    # Multi-Query Search
+    MULTI_SEARCH_MAX_QUERIES: int = 6
+    MULTI_SEARCH_RESULTS_PER_QUERY: int = 5
+    MULTI_SEARCH_WORKERS: int = 6
+    MULTI_SEARCH_RRF_K: int = 60
+    MULTI_SEARCH_SNIPPET_CHARS: int = 300
+
+    # Semantic Report Cache
+    ENABLE_REPORT_CACHE: bool = False
+    REPORT_CACHE_DIR: Path = Path(".report_cache")
+    REPORT_CACHE_SIMILARITY: float = 0.8
+    ANGLE_CACHE_SIMILARITY: float = 0.85
+    REPORT_CACHE_MAX_AGE_HOURS: float = 72
+    REPORT_CACHE_TIME_SENSITIVE_MAX_AGE_HOURS: float = 12
+    REPORT_CACHE_MAX_ENTRIES: int = 1000
+
+    # Worker Job Queue
+    JOB_QUEUE_PATH: Path = Path(".jobs/queue.db")
+    WORKER_POLL_SECONDS: float = 1.0
+    JOB_LEASE_SECONDS: float = 120
+    JOB_HEARTBEAT_SECONDS: float = 30
+
+    # Batch API Backend (worker.py batch)
+    BATCH_MAX_REQUESTS: int = 500
+    BATCH_FLUSH_SECONDS: float = 30
+    BATCH_POLL_SECONDS: float = 30
+    BATCH_MAX_WAIT_SECONDS: float = 86400
+
+    # Progress Streaming Service
+    SERVER_MAX_CONCURRENT_RUNS: int = 4
+    SERVER_MAX_RETAINED_RUNS: int = 100
+    SERVER_REPORT_CHUNK_CHARS: int = 2000
+    SERVER_HEARTBEAT_SECONDS: float = 15
+
+    # Priority Scheduler (shared by all processes using SCHEDULER_PATH): LLM and tool calls wait for a
+    # slot, weighted by priority class
+    ENABLE_SCHEDULER: bool = False
+    SCHEDULER_LLM_SLOTS: int = 8
+    SCHEDULER_TOOL_SLOTS: int = 16
+    SCHEDULER_WEIGHTS: str = "interactive=4,batch=1"
+    SCHEDULER_STARVATION_SECONDS: float = 30
+    SCHEDULER_PATH: Path = Path(".jobs/scheduler.db")
+    SCHEDULER_POLL_SECONDS: float = 0.05
+    SCHEDULER_MAX_HOLD_SECONDS: float = 900
+
+    # Metrics (METRICS_PORT=0 disables the standalone /metrics endpoint)
+    METRICS_HOST: str = "127.0.0.1"
+    METRICS_PORT: int = 0
+
     # Output Configuration
     REPORTS_DIR: Path = Path("reports")
 
@@ -34,13 +178,9 @@ class Config:
     def _load_env_file(self):
         """Load .env file if exists, or Streamlit secrets."""
         # Try Streamlit secrets first (for cloud deployment)
-        try:
-            import streamlit as st
-            if hasattr(st, 'secrets'):
-                # Running in Streamlit, use secrets
-                return
-        except ImportError:
-            pass
+        if _running_in_streamlit():
+            # Running in Streamlit, use secrets
+            return
 
         # Try python-dotenv
         try:
@@ -56,13 +196,13 @@ class Config:
         gemini_key = None
         tavily_key = None
 
-        try:
-            import streamlit as st
-            if hasattr(st, 'secrets'):
+        if _running_in_streamlit():
+            try:
+                st = sys.modules['streamlit']
                 gemini_key = st.secrets.get('GEMINI_API_KEY', '').strip()
                 tavily_key = st.secrets.get('TAVILY_API_KEY', '').strip()
-        except (ImportError, FileNotFoundError, AttributeError):
-            pass
+            except (FileNotFoundError, AttributeError):
+                pass
 
         # Fall back to environment variables
         if not gemini_key:
@@ -88,11 +228,143 @@ class Config:
         # Load optional configurations from environment
         self.GEMINI_MODEL = os.environ.get('GEMINI_MODEL', self.GEMINI_MODEL)
         self.THINKING_LEVEL = os.environ.get('THINKING_LEVEL', self.THINKING_LEVEL)
+        self.GEMINI_API_BASE = os.environ.get('GEMINI_API_BASE', self.GEMINI_API_BASE).rstrip('/')
         self.MAX_TOOL_ITERATIONS = int(os.environ.get('MAX_TOOL_ITERATIONS', str(self.MAX_TOOL_ITERATIONS)))
+        self.RUN_MAX_SECONDS = float(os.environ.get('RUN_MAX_SECONDS', str(self.RUN_MAX_SECONDS)))
+        self.RUN_MAX_TOKENS = int(os.environ.get('RUN_MAX_TOKENS', str(self.RUN_MAX_TOKENS)))
+        self.RUN_MAX_TOOL_ITERATIONS = int(os.environ.get('RUN_MAX_TOOL_ITERATIONS', str(self.RUN_MAX_TOOL_ITERATIONS)))
+        self.ANGLE_MAX_SECONDS = float(os.environ.get('ANGLE_MAX_SECONDS', str(self.ANGLE_MAX_SECONDS)))
+        self.ANGLE_MAX_TOKENS = int(os.environ.get('ANGLE_MAX_TOKENS', str(self.ANGLE_MAX_TOKENS)))
+        self.NO_PROGRESS_TURN_LIMIT = int(os.environ.get('NO_PROGRESS_TURN_LIMIT', str(self.NO_PROGRESS_TURN_LIMIT)))
+        self.FUSED_PLANNING = _env_bool('FUSED_PLANNING', self.FUSED_PLANNING)
+        self.SPECULATIVE_RESEARCH = _env_bool('SPECULATIVE_RESEARCH', self.SPECULATIVE_RESEARCH)
+        self.SPECULATIVE_MAX_ANGLES = int(os.environ.get('SPECULATIVE_MAX_ANGLES', str(self.SPECULATIVE_MAX_ANGLES)))
+        self.SPECULATIVE_MAX_ITERATIONS = int(os.environ.get('SPECULATIVE_MAX_ITERATIONS', str(self.SPECULATIVE_MAX_ITERATIONS)))
+        self.SPECULATIVE_PLAN_SIMILARITY = float(os.environ.get('SPECULATIVE_PLAN_SIMILARITY', str(self.SPECULATIVE_PLAN_SIMILARITY)))
+        self.SPECULATIVE_ANGLE_SIMILARITY = float(os.environ.get('SPECULATIVE_ANGLE_SIMILARITY', str(self.SPECULATIVE_ANGLE_SIMILARITY)))
+        self.PIPELINE_PLANNING = _env_bool('PIPELINE_PLANNING', self.PIPELINE_PLANNING)
+        self.PHASE_3_CONCURRENCY = max(1, int(os.environ.get('PHASE_3_CONCURRENCY', str(self.PHASE_3_CONCURRENCY))))
+        self.ENABLE_GRAPH_SCHEDULER = _env_bool('ENABLE_GRAPH_SCHEDULER', self.ENABLE_GRAPH_SCHEDULER)
+        self.GRAPH_MAX_GAP_ANGLES = int(os.environ.get('GRAPH_MAX_GAP_ANGLES', str(self.GRAPH_MAX_GAP_ANGLES)))
+        self.REFLECTION_MAX_CHARS = int(os.environ.get('REFLECTION_MAX_CHARS', str(self.REFLECTION_MAX_CHARS)))
+        self.REPORT_MAX_CHARS = int(os.environ.get('REPORT_MAX_CHARS', str(self.REPORT_MAX_CHARS)))
+        self.REPORT_MAX_SOURCES = int(os.environ.get('REPORT_MAX_SOURCES', str(self.REPORT_MAX_SOURCES)))
+        self.ENABLE_CONTEXT_CACHE = _env_bool('ENABLE_CONTEXT_CACHE', self.ENABLE_CONTEXT_CACHE)
+        self.CONTEXT_CACHE_MIN_TOKENS = int(os.environ.get('CONTEXT_CACHE_MIN_TOKENS', str(self.CONTEXT_CACHE_MIN_TOKENS)))
+        self.CONTEXT_CACHE_TTL_SECONDS = int(os.environ.get('CONTEXT_CACHE_TTL_SECONDS', str(self.CONTEXT_CACHE_TTL_SECONDS)))
+        self.LLM_CACHE_MODE = os.environ.get('LLM_CACHE_MODE', self.LLM_CACHE_MODE).strip().lower()
+        self.LLM_CACHE_DIR = Path(os.environ.get('LLM_CACHE_DIR', str(self.LLM_CACHE_DIR)))
+        self.ENABLE_PREFETCH = _env_bool('ENABLE_PREFETCH', self.ENABLE_PREFETCH)
+        self.PREFETCH_TOP_N = int(os.environ.get('PREFETCH_TOP_N', str(self.PREFETCH_TOP_N)))
+        self.PREFETCH_MAX_DOCUMENTS = int(os.environ.get('PREFETCH_MAX_DOCUMENTS', str(self.PREFETCH_MAX_DOCUMENTS)))
+        self.PREFETCH_MAX_BYTES = int(os.environ.get('PREFETCH_MAX_BYTES', str(self.PREFETCH_MAX_BYTES)))
+        self.PREFETCH_WORKERS = int(os.environ.get('PREFETCH_WORKERS', str(self.PREFETCH_WORKERS)))
+        self.PREFETCH_WAIT_SECONDS = float(os.environ.get('PREFETCH_WAIT_SECONDS', str(self.PREFETCH_WAIT_SECONDS)))
+        self.FETCH_HEDGE_DELAY_SECONDS = float(os.environ.get('FETCH_HEDGE_DELAY_SECONDS', str(self.FETCH_HEDGE_DELAY_SECONDS)))
+        routes_path = os.environ.get('FETCH_ROUTES_PATH', str(self.FETCH_ROUTES_PATH)).strip()
+        self.FETCH_ROUTES_PATH = Path(routes_path) if routes_path else None
+        self.FETCH_MAX_WORKERS = int(os.environ.get('FETCH_MAX_WORKERS', str(self.FETCH_MAX_WORKERS)))
+        self.JINA_TIMEOUT_SECONDS = float(os.environ.get('JINA_TIMEOUT_SECONDS', str(self.JINA_TIMEOUT_SECONDS)))
+        self.MAX_HTML_BYTES = int(os.environ.get('MAX_HTML_BYTES', str(self.MAX_HTML_BYTES)))
+        self.MAX_PDF_BYTES = int(os.environ.get('MAX_PDF_BYTES', str(self.MAX_PDF_BYTES)))
+        self.ENABLE_CIRCUIT_BREAKER = _env_bool('ENABLE_CIRCUIT_BREAKER', self.ENABLE_CIRCUIT_BREAKER)
+        self.CIRCUIT_BREAKER_PATH = Path(os.environ.get('CIRCUIT_BREAKER_PATH', str(self.CIRCUIT_BREAKER_PATH)))
+        self.CIRCUIT_BREAKER_FAILURES = int(os.environ.get('CIRCUIT_BREAKER_FAILURES', str(self.CIRCUIT_BREAKER_FAILURES)))
+        self.CIRCUIT_BREAKER_COOLDOWN_SECONDS = float(os.environ.get(
+            'CIRCUIT_BREAKER_COOLDOWN_SECONDS', str(self.CIRCUIT_BREAKER_COOLDOWN_SECONDS)))
+        self.ENABLE_LOCAL_INDEX = _env_bool('ENABLE_LOCAL_INDEX', self.ENABLE_LOCAL_INDEX)
+        self.LOCAL_INDEX_PATH = Path(os.environ.get('LOCAL_INDEX_PATH', str(self.LOCAL_INDEX_PATH)))
+        self.LOCAL_INDEX_MAX_AGE_DAYS = float(os.environ.get('LOCAL_INDEX_MAX_AGE_DAYS', str(self.LOCAL_INDEX_MAX_AGE_DAYS)))
+        self.ARXIV_STORE_PATH = Path(os.environ.get('ARXIV_STORE_PATH', str(self.ARXIV_STORE_PATH)))
+        self.ARXIV_ID_BATCH_SIZE = int(os.environ.get('ARXIV_ID_BATCH_SIZE', str(self.ARXIV_ID_BATCH_SIZE)))
+        self.SEARCH_RAW_CONTENT = os.environ.get('SEARCH_RAW_CONTENT', self.SEARCH_RAW_CONTENT).strip().lower()
+        self.MULTI_SEARCH_MAX_QUERIES = int(os.environ.get('MULTI_SEARCH_MAX_QUERIES', str(self.MULTI_SEARCH_MAX_QUERIES)))
+        self.MULTI_SEARCH_RESULTS_PER_QUERY = int(os.environ.get(
+            'MULTI_SEARCH_RESULTS_PER_QUERY', str(self.MULTI_SEARCH_RESULTS_PER_QUERY)))
+        self.MULTI_SEARCH_WORKERS = max(int(os.environ.get('MULTI_SEARCH_WORKERS', str(self.MULTI_SEARCH_WORKERS))), 1)
+        self.MULTI_SEARCH_RRF_K = int(os.environ.get('MULTI_SEARCH_RRF_K', str(self.MULTI_SEARCH_RRF_K)))
+        self.MULTI_SEARCH_SNIPPET_CHARS = int(os.environ.get('MULTI_SEARCH_SNIPPET_CHARS', str(self.MULTI_SEARCH_SNIPPET_CHARS)))
+        self.ENABLE_REPORT_CACHE = _env_bool('ENABLE_REPORT_CACHE', self.ENABLE_REPORT_CACHE)
+        self.REPORT_CACHE_DIR = Path(os.environ.get('REPORT_CACHE_DIR', str(self.REPORT_CACHE_DIR)))
+        self.REPORT_CACHE_SIMILARITY = float(os.environ.get('REPORT_CACHE_SIMILARITY', str(self.REPORT_CACHE_SIMILARITY)))
+        self.ANGLE_CACHE_SIMILARITY = float(os.environ.get('ANGLE_CACHE_SIMILARITY', str(self.ANGLE_CACHE_SIMILARITY)))
+        self.REPORT_CACHE_MAX_AGE_HOURS = float(os.environ.get('REPORT_CACHE_MAX_AGE_HOURS', str(self.REPORT_CACHE_MAX_AGE_HOURS)))
+        self.REPORT_CACHE_TIME_SENSITIVE_MAX_AGE_HOURS = float(os.environ.get(
+            'REPORT_CACHE_TIME_SENSITIVE_MAX_AGE_HOURS', str(self.REPORT_CACHE_TIME_SENSITIVE_MAX_AGE_HOURS)))
+        self.REPORT_CACHE_MAX_ENTRIES = max(int(os.environ.get(
+            'REPORT_CACHE_MAX_ENTRIES', str(self.REPORT_CACHE_MAX_ENTRIES))), 1)
+
+        self.JOB_QUEUE_PATH = Path(os.environ.get('JOB_QUEUE_PATH', str(self.JOB_QUEUE_PATH)))
+        self.WORKER_POLL_SECONDS = float(os.environ.get('WORKER_POLL_SECONDS', str(self.WORKER_POLL_SECONDS)))
+        self.JOB_LEASE_SECONDS = float(os.environ.get('JOB_LEASE_SECONDS', str(self.JOB_LEASE_SECONDS)))
+        self.JOB_HEARTBEAT_SECONDS = float(os.environ.get('JOB_HEARTBEAT_SECONDS', str(self.JOB_HEARTBEAT_SECONDS)))
+        self.BATCH_MAX_REQUESTS = int(os.environ.get('BATCH_MAX_REQUESTS', str(self.BATCH_MAX_REQUESTS)))
+        self.BATCH_FLUSH_SECONDS = float(os.environ.get('BATCH_FLUSH_SECONDS', str(self.BATCH_FLUSH_SECONDS)))
+        self.BATCH_POLL_SECONDS = float(os.environ.get('BATCH_POLL_SECONDS', str(self.BATCH_POLL_SECONDS)))
+        self.BATCH_MAX_WAIT_SECONDS = float(os.environ.get('BATCH_MAX_WAIT_SECONDS', str(self.BATCH_MAX_WAIT_SECONDS)))
+        self.SERVER_MAX_CONCURRENT_RUNS = int(os.environ.get('SERVER_MAX_CONCURRENT_RUNS', str(self.SERVER_MAX_CONCURRENT_RUNS)))
+        self.SERVER_MAX_RETAINED_RUNS = int(os.environ.get('SERVER_MAX_RETAINED_RUNS', str(self.SERVER_MAX_RETAINED_RUNS)))
+        self.SERVER_REPORT_CHUNK_CHARS = int(os.environ.get('SERVER_REPORT_CHUNK_CHARS', str(self.SERVER_REPORT_CHUNK_CHARS)))
+        self.SERVER_HEARTBEAT_SECONDS = float(os.environ.get('SERVER_HEARTBEAT_SECONDS', str(self.SERVER_HEARTBEAT_SECONDS)))
+        self.ENABLE_SCHEDULER = _env_bool('ENABLE_SCHEDULER', self.ENABLE_SCHEDULER)
+        self.SCHEDULER_LLM_SLOTS = max(int(os.environ.get('SCHEDULER_LLM_SLOTS', str(self.SCHEDULER_LLM_SLOTS))), 1)
+        self.SCHEDULER_TOOL_SLOTS = max(int(os.environ.get('SCHEDULER_TOOL_SLOTS', str(self.SCHEDULER_TOOL_SLOTS))), 1)
+        self.SCHEDULER_WEIGHTS = os.environ.get('SCHEDULER_WEIGHTS', self.SCHEDULER_WEIGHTS)
+        self.SCHEDULER_STARVATION_SECONDS = float(os.environ.get(
+            'SCHEDULER_STARVATION_SECONDS', str(self.SCHEDULER_STARVATION_SECONDS)))
+        self.SCHEDULER_PATH = Path(os.environ.get('SCHEDULER_PATH', str(self.SCHEDULER_PATH)))
+        self.SCHEDULER_POLL_SECONDS = max(float(os.environ.get(
+            'SCHEDULER_POLL_SECONDS', str(self.SCHEDULER_POLL_SECONDS))), 0.001)
+        self.SCHEDULER_MAX_HOLD_SECONDS = float(os.environ.get(
+            'SCHEDULER_MAX_HOLD_SECONDS', str(self.SCHEDULER_MAX_HOLD_SECONDS)))
+        self.METRICS_HOST = os.environ.get('METRICS_HOST', self.METRICS_HOST)
+        self.METRICS_PORT = int(os.environ.get('METRICS_PORT', str(self.METRICS_PORT)))
+
+        self._validate_choices()
 
         # Create reports directory if it doesn't exist
         self.REPORTS_DIR.mkdir(exist_ok=True)
 
+    def _validate_choices(self):
+        if self.LLM_CACHE_MODE not in ("off", "record", "replay", "replay_or_record"):
+            raise ConfigurationError(
+                f"LLM_CACHE_MODE must be one of off, record, replay, replay_or_record (got '{self.LLM_CACHE_MODE}')."
+            )
+        if self.SEARCH_RAW_CONTENT not in ("off", "markdown", "text"):
+            raise ConfigurationError(
+                f"SEARCH_RAW_CONTENT must be one of off, markdown, text (got '{self.SEARCH_RAW_CONTENT}')."
+            )
+
+    def with_overrides(self, **overrides) -> 'Config':
+        """
+        Return a copy of this configuration with some settings replaced, e.g. for one run.
+
+        Values are converted to the type of the setting they replace, so
+        strings from JSON or the command line work for numbers and flags.
+
+        Raises:
+            ConfigurationError: If a setting is unknown or a value is invalid
+        """
+        unknown = [name for name in overrides if not name.isupper() or not hasattr(self, name)]
+        if unknown:
+            raise ConfigurationError(f"Unknown configuration settings: {', '.join(sorted(unknown))}")
+
+        config = copy.copy(self)
+        for name, value in overrides.items():
+            current = getattr(self, name)
+            try:
+                if isinstance(current, bool):
+                    value = value if isinstance(value, bool) else str(value).strip().lower() in ("1", "true", "yes", "on")
+                elif isinstance(current, (int, float, Path)):
+                    value = type(current)(value)
+                elif isinstance(current, str):
+                    value = str(value)
+            except (TypeError, ValueError):
+                raise ConfigurationError(f"Invalid value for {name}: {value!r}")
+            setattr(config, name, value)
+        config._validate_choices()
+        return config
+
     @classmethod
     def get_instance(cls) -> 'Config':
         """Get singleton config instance."""
@@ -103,5 +375,25 @@ class Config:
 
 # Singleton access function
 def get_config() -> Config:
-    """Get validated configuration instance."""
-    return Config.get_instance()
+    """Get the configuration of the current run if one is active, else the validated process-wide instance."""
+    return _run_config.get() or Config.get_instance()
+
+
+@contextlib.contextmanager
+def use_config(config: Optional[Config]):
+    """
+    Make get_config() return config in this context (and in threads that copy it).
+
+    Lets one process run concurrent workflows with different models, budgets
+    or API keys. Process-wide resources (local index, circuit breaker, fetch
+    routes, scheduler, metrics server) keep the settings they were created
+    with. None leaves the current configuration in place.
+    """
+    if config is None:
+        yield get_config()
+        return
+    token = _run_config.set(config)
+    try:
+        yield config
+    finally:
+        _run_config.reset(token)
@@ -0,0 +1,123 @@
+"""Explicit Gemini context caching for the tool-calling loop."""
+import atexit
+import threading
+from typing import Optional
+
+import requests
+
+from config import get_config
+
+# Names of cached contents created by this process, deleted on exit
+_live_caches = set()
+_live_caches_lock = threading.Lock()
+
+
+class ContextCache:
+    """
+    Cached content covering the stable prefix of one tool-loop conversation.
+
+    The prefix (first prompt, tool declarations and every completed turn
+    except the latest one) is registered with the cachedContents API and
+    referenced by name on later turns, so only the newest messages are sent.
+    The cache is re-created further along the conversation whenever the
+    uncached part grows past the configured token threshold.
+    """
+
+    def __init__(self, model: str, tools: list, min_tokens: Optional[int] = None,
+                 ttl_seconds: Optional[int] = None):
+        config = get_config()
+        self.model = model
+        self.tools = tools
+        self.min_tokens = min_tokens or config.CONTEXT_CACHE_MIN_TOKENS
+        self.ttl_seconds = ttl_seconds or config.CONTEXT_CACHE_TTL_SECONDS
+        self.name: Optional[str] = None
+        self.cached_messages = 0
+        self.disabled = False
+
+    def split(self, messages: list) -> tuple:
+        """Return (cached content name, messages still to send) for a request."""
+        if self.name and len(messages) > self.cached_messages:
+            return self.name, messages[self.cached_messages:]
+        return None, messages
+
+    def update(self, messages: list, response: dict):
+        """Extend the cached prefix after a turn if the uncached part is large enough."""
+        if self.disabled:
+            return
+
+        usage = response.get("usageMetadata", {})
+        uncached_tokens = usage.get("promptTokenCount", 0) - usage.get("cachedContentTokenCount", 0)
+        # Keep the latest turn out of the cache so each request has fresh contents
+        prefix_len = len(messages) - 2
+        if uncached_tokens < self.min_tokens or prefix_len <= self.cached_messages:
+            return
+
+        name = self._create(messages[:prefix_len])
+        if name:
+            self.delete()
+            self.name = name
+            self.cached_messages = prefix_len
+
+    def invalidate(self):
+        """Stop using the current cache (e.g. after it expired server-side)."""
+        self.delete()
+        self.disabled = True
+
+    def delete(self):
+        """Delete the current cached content, if any."""
+        if not self.name:
+            return
+        name, self.name = self.name, None
+        self.cached_messages = 0
+        _delete_cached_content(name)
+
+    def _create(self, prefix: list) -> Optional[str]:
+        config = get_config()
+        try:
+            response = requests.post(
+                url=f"{config.GEMINI_API_BASE}/cachedContents?key={config.GEMINI_API_KEY}",
+                headers={"Content-Type": "application/json"},
+                json={
+                    "model": f"models/{self.model}",
+                    "contents": prefix,
+                    "tools": [{"functionDeclarations": self.tools}],
+                    "ttl": f"{self.ttl_seconds}s",
+                },
+                timeout=30,
+            )
+            response.raise_for_status()
+            name = response.json()["name"]
+        except Exception as e:
+            # Model or prefix not eligible for caching: keep sending full requests
+            print(f"Context cache unavailable, continuing without it: {str(e)}")
+            self.disabled = True
+            return None
+
+        with _live_caches_lock:
+            _live_caches.add(name)
+        return name
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.delete()
+
+
+def _delete_cached_content(name: str):
+    with _live_caches_lock:
+        _live_caches.discard(name)
+    try:
+        config = get_config()
+        requests.delete(f"{config.GEMINI_API_BASE}/{name}?key={config.GEMINI_API_KEY}", timeout=10)
+    except Exception:
+        # The TTL expires it server-side anyway
+        pass
+
+
+@atexit.register
+def _cleanup_live_caches():
+    with _live_caches_lock:
+        names = list(_live_caches)
+    for name in names:
+        _delete_cached_content(name)
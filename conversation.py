@@ -0,0 +1,58 @@
+"""Conversation history that encodes each message to JSON only once."""
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def encode_json(obj) -> bytes:
+    """Compact UTF-8 JSON, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class Conversation(list):
+    """
+    List of Gemini messages that caches the encoded bytes of every message.
+
+    Messages are treated as immutable once appended, which holds for the
+    tool-calling loop: it only ever appends. Building a request body then
+    encodes just the messages added since the last turn and concatenates the
+    cached fragments, instead of re-serializing the whole history each turn.
+    Slices share the cache, so a context-cache split keeps the benefit.
+    """
+
+    def __init__(self, messages=(), _cache: dict = None):
+        super().__init__(messages)
+        # id(message) -> (message, bytes); keeping the message alive keeps its id unique
+        self._cache = {} if _cache is None else _cache
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return Conversation(super().__getitem__(index), _cache=self._cache)
+        return super().__getitem__(index)
+
+    def encoded_message(self, message: dict) -> bytes:
+        entry = self._cache.get(id(message))
+        if entry is None or entry[0] is not message:
+            entry = (message, encode_json(message))
+            self._cache[id(message)] = entry
+        return entry[1]
+
+    def encode(self) -> bytes:
+        """The conversation as a JSON array, assembled from cached message fragments."""
+        return b"[" + b",".join(self.encoded_message(message) for message in self) + b"]"
+
+
+def encode_request(payload: dict) -> bytes:
+    """Encode a generateContent payload, reusing cached fragments when contents is a Conversation."""
+    contents = payload.get("contents")
+    if not isinstance(contents, Conversation):
+        return encode_json(payload)
+    rest = encode_json({key: value for key, value in payload.items() if key != "contents"})
+    if rest == b"{}":
+        return b'{"contents":' + contents.encode() + b"}"
+    return b'{"contents":' + contents.encode() + b"," + rest[1:]
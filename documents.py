@@ -0,0 +1,115 @@
+"""Run-scoped document cache with speculative prefetching of search result URLs."""
+import contextvars
+import re
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError
+from typing import Callable, Optional
+
+from config import get_config
+
+_active_documents = contextvars.ContextVar("active_documents", default=None)
+
+_URL_LINE_RE = re.compile(r"^URL: (\S+)\s*$", re.MULTILINE)
+
+
+def extract_result_urls(search_output: str) -> list:
+    """Return URLs from formatted web_search / arxiv_search output, in rank order."""
+    return _URL_LINE_RE.findall(search_output or "")
+
+
+def active_documents() -> Optional['DocumentCache']:
+    """Return the document cache of the current run, if any."""
+    return _active_documents.get()
+
+
+class DocumentCache:
+    """
+    Fetched documents of one workflow run, keyed by URL.
+
+    Search tools hand their top result URLs to prefetch(), which fetches
+    them in the background while the model is thinking, so a later fetch_url
+    on the same URL returns as soon as the download has finished. Prefetching
+    is bounded by a per-search count, a per-run document count and a per-run
+    byte budget; a prefetched document that would overrun the budget once it
+    arrives is dropped, since concurrent downloads can't be sized up front.
+    """
+
+    def __init__(self, prefetch: Optional[bool] = None):
+        config = get_config()
+        self.prefetch_enabled = config.ENABLE_PREFETCH if prefetch is None else prefetch
+        self.top_n = config.PREFETCH_TOP_N
+        self.max_documents = config.PREFETCH_MAX_DOCUMENTS
+        self.max_bytes = config.PREFETCH_MAX_BYTES
+        self.wait_seconds = config.PREFETCH_WAIT_SECONDS
+        self._workers = config.PREFETCH_WORKERS
+        self._documents = {}  # url -> str or Future
+        self._prefetched = 0
+        self._prefetched_bytes = 0
+        self._executor = None
+        self._lock = threading.Lock()
+        self._token = None
+
+    def get(self, url: str) -> Optional[str]:
+        """Return the stored or in-flight document for url, or None."""
+        with self._lock:
+            entry = self._documents.get(url)
+        if isinstance(entry, Future):
+            try:
+                return entry.result(timeout=self.wait_seconds)
+            except (TimeoutError, Exception):
+                return None
+        return entry
+
+    def put(self, url: str, content: str):
+        with self._lock:
+            self._documents[url] = content
+
+    def offer(self, url: str, content: str) -> bool:
+        """Store content for url unless the run already has or is fetching it; returns whether it was stored."""
+        with self._lock:
+            if url in self._documents:
+                return False
+            self._documents[url] = content
+            return True
+
+    def prefetch(self, urls: list, fetcher: Callable[[str], str]):
+        """Start background fetches for the top URLs not already known."""
+        if not self.prefetch_enabled:
+            return
+
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="prefetch")
+            for url in urls[:self.top_n]:
+                if url in self._documents:
+                    continue
+                if self._prefetched >= self.max_documents or self._prefetched_bytes >= self.max_bytes:
+                    break
+                self._prefetched += 1
+                context = contextvars.copy_context()
+                self._documents[url] = self._executor.submit(context.run, self._prefetch_one, url, fetcher)
+
+    def _prefetch_one(self, url: str, fetcher: Callable[[str], str]) -> Optional[str]:
+        content = fetcher(url)
+        size = len(content.encode("utf-8")) if content else 0
+        with self._lock:
+            if content is None or content.startswith("Error") or self._prefetched_bytes + size > self.max_bytes:
+                # Let fetch_url retry in the foreground (and report any error itself); documents over
+                # the byte budget are not kept
+                self._documents.pop(url, None)
+                return None
+            self._prefetched_bytes += size
+            self._documents[url] = content
+        return content
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def __enter__(self):
+        self._token = _active_documents.set(self)
+        return self
+
+    def __exit__(self, *exc):
+        _active_documents.reset(self._token)
+        self.close()
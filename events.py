@@ -2,6 +2,9 @@
 from dataclasses import dataclass
 from typing import Any, Callable, Optional
 from enum import Enum
+import time
+
+import metrics
 
 
 class PhaseStatus(Enum):
@@ -39,10 +42,13 @@ class WorkflowEventHandler:
         on_phase_update: Optional[Callable[[PhaseEvent], None]] = None,
         on_tool_call: Optional[Callable[[ToolCallEvent], None]] = None,
         on_clarification_needed: Optional[Callable[[str], str]] = None,
+        on_report_chunk: Optional[Callable[[str], None]] = None,
     ):
         self.on_phase_update = on_phase_update or self._default_phase_handler
         self.on_tool_call = on_tool_call or self._default_tool_handler
         self.on_clarification_needed = on_clarification_needed or self._default_clarification_handler
+        self.on_report_chunk = on_report_chunk
+        self._phase_started = {}
 
     def _default_phase_handler(self, event: PhaseEvent):
         """Default handler prints to console."""
@@ -71,9 +77,20 @@ class WorkflowEventHandler:
     def emit_phase(self, phase_number: str, phase_name: str, status: PhaseStatus,
                    data: Optional[dict] = None, message: Optional[str] = None):
         """Emit phase event."""
+        self._record_phase_metrics(phase_number, status)
         event = PhaseEvent(phase_number, phase_name, status, data, message)
         self.on_phase_update(event)
 
+    def _record_phase_metrics(self, phase_number: str, status: PhaseStatus):
+        # Label LLM calls with the running phase and time each phase from its first RUNNING event
+        if status == PhaseStatus.RUNNING:
+            metrics.set_current_phase(phase_number)
+            self._phase_started.setdefault(phase_number, time.monotonic())
+        elif status in (PhaseStatus.COMPLETED, PhaseStatus.FAILED):
+            started = self._phase_started.pop(phase_number, None)
+            if started is not None:
+                metrics.PHASE_SECONDS.observe(time.monotonic() - started, phase=phase_number)
+
     def emit_tool_call(self, tool_name: str, arguments: dict, result: str):
         """Emit tool call event."""
         from datetime import datetime
@@ -85,6 +102,16 @@ class WorkflowEventHandler:
         )
         self.on_tool_call(event)
 
+    @property
+    def streams_report(self) -> bool:
+        """True if the final report should be generated as a stream and emitted chunk by chunk."""
+        return self.on_report_chunk is not None
+
+    def emit_report_chunk(self, text: str):
+        """Emit the next piece of the final report as Phase 5 generates it."""
+        if self.on_report_chunk:
+            self.on_report_chunk(text)
+
     def request_clarification(self, questions: str) -> str:
         """Request clarification from user."""
         return self.on_clarification_needed(questions)
@@ -0,0 +1,108 @@
+"""Structured store of per-angle research findings and their sources."""
+import sys
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+_TRUNCATION_MARKER = " [...]"
+_SEPARATOR = "\n\n"
+
+
+@dataclass(slots=True)
+class AngleEvidence:
+    """Findings for one investigated angle; sources and documents are ids into the store."""
+    angle: str
+    summary: str
+    source_ids: tuple
+    document_ids: tuple
+    round: int = 1
+
+
+class EvidenceStore:
+    """
+    Evidence gathered across all angles and reflection rounds of a run.
+
+    URLs are interned once and referenced by integer id, so repeated
+    citations cost nothing. Phases 4 and 5 render prompt text from the store
+    on demand within a character budget instead of carrying a growing
+    concatenated string.
+    """
+
+    def __init__(self):
+        self.angles = []
+        self._urls = []
+        self._url_ids = {}
+        self._lock = threading.Lock()
+
+    def _url_id(self, url: str) -> int:
+        url = sys.intern(url.strip())
+        url_id = self._url_ids.get(url)
+        if url_id is None:
+            url_id = self._url_ids[url] = len(self._urls)
+            self._urls.append(url)
+        return url_id
+
+    def add_angle(self, angle: str, summary: str, sources_used: list,
+                  fetched_urls: Optional[list] = None, round: int = 1) -> AngleEvidence:
+        with self._lock:
+            record = AngleEvidence(
+                angle=angle,
+                summary=summary,
+                # sources_used comes from model output and may hold non-string entries
+                source_ids=tuple(dict.fromkeys(
+                    self._url_id(u) for u in sources_used if isinstance(u, str) and u.strip())),
+                document_ids=tuple(dict.fromkeys(
+                    self._url_id(u) for u in fetched_urls or [] if isinstance(u, str) and u.strip())),
+                round=round,
+            )
+            self.angles.append(record)
+        return record
+
+    def angle_names(self) -> list:
+        return [record.angle for record in self.angles]
+
+    def source_urls(self) -> list:
+        """Cited URLs in first-cited order."""
+        ids = dict.fromkeys(i for record in self.angles for i in record.source_ids)
+        return [self._urls[i] for i in ids]
+
+    def document_urls(self, record: AngleEvidence) -> list:
+        return [self._urls[i] for i in record.document_ids]
+
+    def render_synthesis(self, max_chars: Optional[int] = None) -> str:
+        """Angle summaries joined for a prompt, each trimmed to a fair share of max_chars."""
+        summaries = [record.summary for record in self.angles]
+        if max_chars:
+            limits = _fair_shares([len(s) for s in summaries], max_chars, separator_chars=len(_SEPARATOR))
+            summaries = [
+                s if len(s) <= limit else _truncate(s, limit)
+                for s, limit in zip(summaries, limits)
+            ]
+        return _SEPARATOR.join(summaries)
+
+    def render_sources(self, max_sources: Optional[int] = None) -> str:
+        """Numbered list of cited URLs for the report prompt."""
+        urls = self.source_urls()
+        if max_sources:
+            urls = urls[:max_sources]
+        return "\n".join(f"[{i}] {url}" for i, url in enumerate(urls, 1))
+
+
+def _truncate(text: str, limit: int) -> str:
+    """Cut text to limit characters, ending with the truncation marker when it fits."""
+    if limit < len(_TRUNCATION_MARKER):
+        return text[:limit]
+    return text[:limit - len(_TRUNCATION_MARKER)] + _TRUNCATION_MARKER
+
+
+def _fair_shares(lengths: list, budget: int, separator_chars: int = 0) -> list:
+    """Split budget, less the separators between items, so short items keep their full length (water-filling)."""
+    limits = [0] * len(lengths)
+    remaining = max(budget - separator_chars * max(len(lengths) - 1, 0), 0)
+    pending = sorted(range(len(lengths)), key=lambda i: lengths[i])
+    while pending:
+        share = remaining // len(pending)
+        i = pending.pop(0)
+        limits[i] = min(lengths[i], share)
+        remaining -= limits[i]
+    return limits
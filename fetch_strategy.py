@@ -0,0 +1,158 @@
+"""Hedged multi-strategy webpage fetching with per-domain learned routing."""
+import contextvars
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Optional
+from urllib.parse import urlparse
+
+from config import get_config
+
+
+@dataclass(slots=True)
+class StrategyStats:
+    """Success and latency counters for one fetch strategy."""
+    attempts: int = 0
+    successes: int = 0
+    total_seconds: float = 0.0
+
+    @property
+    def success_rate(self) -> float:
+        return self.successes / self.attempts if self.attempts else 0.0
+
+    @property
+    def mean_seconds(self) -> float:
+        return self.total_seconds / self.attempts if self.attempts else 0.0
+
+
+class FetchStrategyEngine:
+    """
+    Fetch a page with an ordered pair of strategies (e.g. direct HTTP, then Jina).
+
+    The preferred strategy for the URL's domain starts first. If it has not
+    returned sufficient content within the hedge delay - or returns
+    insufficient content sooner - the other strategy starts too, and the
+    first sufficient result wins. The winning strategy is remembered per
+    domain (and persisted when a routes file is configured), so domains that
+    need JavaScript rendering go straight to Jina next time.
+    """
+
+    def __init__(self, strategies: dict, is_sufficient: Callable[[Optional[str]], bool],
+                 hedge_delay: Optional[float] = None, routes_path: Optional[Path] = None):
+        config = get_config()
+        self.strategies = strategies
+        self.default_order = list(strategies)
+        self.is_sufficient = is_sufficient
+        self.hedge_delay = config.FETCH_HEDGE_DELAY_SECONDS if hedge_delay is None else hedge_delay
+        self.routes_path = routes_path if routes_path is not None else config.FETCH_ROUTES_PATH
+        self.stats = {name: StrategyStats() for name in strategies}
+        self._routes = self._load_routes()
+        self._executor = ThreadPoolExecutor(max_workers=config.FETCH_MAX_WORKERS, thread_name_prefix="fetch")
+        self._lock = threading.Lock()
+
+    def _load_routes(self) -> dict:
+        if not self.routes_path:
+            return {}
+        try:
+            with open(self.routes_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def _save_routes(self):
+        if not self.routes_path:
+            return
+        path = Path(self.routes_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(self._routes, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, path)
+
+    def route(self, domain: str) -> list:
+        """Strategy names in the order to try them for a domain."""
+        preferred = self._routes.get(domain)
+        if preferred not in self.strategies:
+            return list(self.default_order)
+        return [preferred] + [name for name in self.default_order if name != preferred]
+
+    def _learn(self, domain: str, winner: str):
+        with self._lock:
+            if self._routes.get(domain) == winner:
+                return
+            self._routes[domain] = winner
+            try:
+                self._save_routes()
+            except OSError as e:
+                print(f"Failed to save fetch routes: {str(e)}")
+
+    def _run_strategy(self, name: str, url: str) -> str:
+        started = time.monotonic()
+        try:
+            content = self.strategies[name](url)
+        except Exception as e:
+            content = f"Error fetching with {name}: {str(e)}"
+        elapsed = time.monotonic() - started
+        with self._lock:
+            stats = self.stats[name]
+            stats.attempts += 1
+            stats.total_seconds += elapsed
+            if self.is_sufficient(content):
+                stats.successes += 1
+        return content
+
+    def _submit(self, name: str, url: str):
+        context = contextvars.copy_context()
+        return self._executor.submit(context.run, self._run_strategy, name, url)
+
+    def fetch(self, url: str) -> str:
+        """Return the first sufficient content from any strategy, else the last fallback's output."""
+        return self.fetch_results(url)[0]
+
+    def fetch_results(self, url: str) -> tuple:
+        """Like fetch, also returning the output of every strategy that finished, by name."""
+        domain = urlparse(url).hostname or ""
+        order = self.route(domain)
+        results = {}
+        pending = {self._submit(order[0], url): order[0]}
+        next_strategy = 1
+
+        while pending:
+            hedging = next_strategy < len(order)
+            done, _ = wait(pending, timeout=self.hedge_delay if hedging else None, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = pending.pop(future)
+                results[name] = future.result()
+                if self.is_sufficient(results[name]):
+                    self._learn(domain, name)
+                    return results[name], results
+            # Start the next strategy: either the hedge delay passed or a strategy came back insufficient
+            if hedging:
+                pending[self._submit(order[next_strategy], url)] = order[next_strategy]
+                next_strategy += 1
+
+        # Nothing was sufficient: prefer the output of the last-resort strategy, as before
+        for name in reversed(self.default_order):
+            if name in results:
+                return results[name], results
+        return "No content extracted.", results
+
+    def snapshot(self) -> dict:
+        """Per-strategy stats and the number of learned domain routes."""
+        with self._lock:
+            return {
+                "strategies": {
+                    name: {
+                        "attempts": s.attempts,
+                        "success_rate": round(s.success_rate, 3),
+                        "mean_seconds": round(s.mean_seconds, 3),
+                    }
+                    for name, s in self.stats.items()
+                },
+                "routes": dict(self._routes),
+            }
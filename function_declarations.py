@@ -44,6 +44,31 @@ arxiv_search_dec = {
     }
 }
 
+multi_search_dec = {
+    "name": "multi_search",
+    "description": "Run several search queries at once on the web and arXiv. Results are merged, deduplicated by URL and ranked across all queries. Prefer this over repeated web_search / arxiv_search calls with different phrasings.",
+    "parameters": {
+        "type": "object",
+        "properties":{
+            "queries":{
+                "type":"array",
+                "items": {"type":"string"},
+                "description":"Search query strings, e.g. different phrasings or sub-questions of the angle"
+            },
+            "sources":{
+                "type":"array",
+                "items": {"type":"string", "enum": ["web", "arxiv"]},
+                "description":"Backends to search (default: both)"
+            },
+            "limit":{
+                "type":"integer",
+                "description":"Maximum number of merged results to return"
+            }
+        },
+        "required": ["queries"],
+    }
+}
+
 fetch_url_dec = {
     "name": "fetch_url",
     "description": "Fetch and extract content from a URL.",
@@ -53,11 +78,47 @@ fetch_url_dec = {
             "url":{
                 "type":"string",
                 "description":"The URL to fetch content from"
+            },
+            "section":{
+                "type":"string",
+                "description":"arXiv papers only: 'outline' for the abstract and list of sections, or a section heading (e.g. 'Introduction') to read just that section instead of the full paper"
             }
         },
         "required": ["url"],
     }
 }
 
+arxiv_papers_dec = {
+    "name": "arxiv_papers",
+    "description": "Get titles, authors, dates and full abstracts for many arXiv papers in one call",
+    "parameters": {
+        "type": "object",
+        "properties":{
+            "ids":{
+                "type":"array",
+                "items": {"type":"string"},
+                "description":"arXiv IDs or URLs, e.g. ['2404.04365', '2301.00001v2']"
+            }
+        },
+        "required": ["ids"],
+    }
+}
 
-
+local_search_dec = {
+    "name": "local_search",
+    "description": "Search the local index of documents and papers fetched in earlier research. Much faster than web_search; try it first and use fetch_url on a result URL to read the full stored document.",
+    "parameters": {
+        "type": "object",
+        "properties":{
+            "query":{
+                "type":"string",
+                "description":"Search query string"
+            },
+            "limit":{
+                "type":"integer",
+                "description":"Maximum number of documents to return"
+            }
+        },
+        "required": ["query"],
+    }
+}
@@ -0,0 +1,82 @@
+"""Deterministic record/replay cache for LLM responses."""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Optional
+
+from config import get_config
+
+MODES = ("off", "record", "replay", "replay_or_record")
+
+
+class LLMCacheMiss(Exception):
+    """Raised in replay mode when no recorded response matches a request."""
+    pass
+
+
+def payload_key(model: str, payload: dict) -> str:
+    """Stable hash of a generateContent request (model, contents, generationConfig, tools)."""
+    canonical = json.dumps(
+        {"model": model, "payload": payload},
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseRecorder:
+    """On-disk store of LLM responses keyed by request hash."""
+
+    def __init__(self, mode: str, directory: Path):
+        if mode not in MODES:
+            raise ValueError(f"Unknown LLM cache mode: {mode}")
+        self.mode = mode
+        self.directory = Path(directory)
+
+    @property
+    def replays(self) -> bool:
+        return self.mode in ("replay", "replay_or_record")
+
+    @property
+    def records(self) -> bool:
+        return self.mode in ("record", "replay_or_record")
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def lookup(self, key: str) -> Optional[dict]:
+        """Return the recorded response for key, or None."""
+        try:
+            with open(self._path(key), encoding="utf-8") as f:
+                return json.load(f)["response"]
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            return None
+
+    def store(self, key: str, model: str, response: dict):
+        """Record a response; the write is atomic so concurrent processes can share a directory."""
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"model": model, "response": response}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+
+_recorders = {}
+_recorders_lock = threading.Lock()
+
+
+def get_recorder() -> Optional[ResponseRecorder]:
+    """Return the recorder for the configured mode, or None when disabled."""
+    config = get_config()
+    if config.LLM_CACHE_MODE == "off":
+        return None
+    cache_key = (config.LLM_CACHE_MODE, str(config.LLM_CACHE_DIR))
+    with _recorders_lock:
+        if cache_key not in _recorders:
+            _recorders[cache_key] = ResponseRecorder(config.LLM_CACHE_MODE, config.LLM_CACHE_DIR)
+        return _recorders[cache_key]
@@ -0,0 +1,114 @@
+"""Persistent full-text index (SQLite FTS5) of every document the agent has fetched."""
+import re
+import sqlite3
+import time
+from pathlib import Path
+from typing import Optional
+
+from config import get_config
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _match_expression(query: str) -> str:
+    """Turn free text into an FTS5 query that ORs the quoted terms (BM25 ranks by coverage)."""
+    terms = [t for t in _TOKEN_RE.findall(query.lower()) if len(t) > 1]
+    return " OR ".join(f'"{t}"' for t in terms)
+
+
+class LocalIndex:
+    """
+    Incrementally built BM25 index over fetched documents.
+
+    Each document is stored once per URL (re-fetching replaces it) in a
+    regular table keyed by URL, so fetch_url lookups are index seeks. An
+    external-content FTS5 table over it, kept in sync by triggers, serves
+    search. A new connection is opened per operation and the database runs
+    in WAL mode, so concurrent threads and worker processes can share one
+    index file.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path or get_config().LOCAL_INDEX_PATH)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            # id is the stable rowid the FTS table points at; url is the lookup key
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS documents ("
+                "id INTEGER PRIMARY KEY, url TEXT NOT NULL UNIQUE, title TEXT, content TEXT, fetched_at REAL)"
+            )
+            conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5("
+                "title, content, content='documents', content_rowid='id', tokenize='porter unicode61')"
+            )
+            conn.executescript("""
+                CREATE TRIGGER IF NOT EXISTS documents_ai AFTER INSERT ON documents BEGIN
+                    INSERT INTO documents_fts (rowid, title, content) VALUES (new.id, new.title, new.content);
+                END;
+                CREATE TRIGGER IF NOT EXISTS documents_ad AFTER DELETE ON documents BEGIN
+                    INSERT INTO documents_fts (documents_fts, rowid, title, content)
+                    VALUES ('delete', old.id, old.title, old.content);
+                END;
+                CREATE TRIGGER IF NOT EXISTS documents_au AFTER UPDATE ON documents BEGIN
+                    INSERT INTO documents_fts (documents_fts, rowid, title, content)
+                    VALUES ('delete', old.id, old.title, old.content);
+                    INSERT INTO documents_fts (rowid, title, content) VALUES (new.id, new.title, new.content);
+                END;
+            """)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def add(self, url: str, content: str, title: Optional[str] = None):
+        """Index (or re-index) the extracted text of a document."""
+        if title is None:
+            title = next((line.strip() for line in content.splitlines() if line.strip()), "")[:200]
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO documents (url, title, content, fetched_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (url) DO UPDATE SET "
+                "title = excluded.title, content = excluded.content, fetched_at = excluded.fetched_at",
+                (url, title, content, time.time()),
+            )
+
+    def get(self, url: str, max_age_seconds: Optional[float] = None) -> Optional[str]:
+        """Return the stored text for url if present (and younger than max_age_seconds)."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT content, fetched_at FROM documents WHERE url = ?", (url,)).fetchone()
+        if not row:
+            return None
+        if max_age_seconds and time.time() - row[1] > max_age_seconds:
+            return None
+        return row[0]
+
+    def search(self, query: str, limit: int = 5) -> list:
+        """Return [{url, title, snippet, fetched_at}] ranked by BM25."""
+        expression = _match_expression(query)
+        if not expression:
+            return []
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT d.url, d.title, snippet(documents_fts, 1, '', '', ' ... ', 48), d.fetched_at "
+                "FROM documents_fts JOIN documents d ON d.id = documents_fts.rowid "
+                "WHERE documents_fts MATCH ? ORDER BY bm25(documents_fts, 2.0, 1.0) LIMIT ?",
+                (expression, limit),
+            ).fetchall()
+        return [
+            {"url": url, "title": title, "snippet": snippet, "fetched_at": fetched_at}
+            for url, title, snippet, fetched_at in rows
+        ]
+
+
+_index = None
+
+
+def get_local_index() -> Optional[LocalIndex]:
+    """Return the shared local index, or None when disabled."""
+    global _index
+    config = get_config()
+    if not config.ENABLE_LOCAL_INDEX:
+        return None
+    if _index is None or _index.path != Path(config.LOCAL_INDEX_PATH):
+        _index = LocalIndex(config.LOCAL_INDEX_PATH)
+    return _index
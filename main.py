@@ -1,8 +1,22 @@
-from prompts import prompt_1, prompt_1_1, prompt_2, prompt_3, prompt_4, prompt_5
-from utils import generate_response, extract_content, prepare_message, convert_response_to_json, generate_response_with_fn_calls
-from config import get_config, ConfigurationError
+from prompts import prompt_1, prompt_1_2, prompt_1_1, prompt_2, prompt_3, prompt_3_local_search, prompt_4, prompt_5
+from utils import generate_response, generate_response_stream, extract_content, prepare_message, convert_response_to_json, generate_response_with_fn_calls
+from config import Config, get_config, use_config, ConfigurationError
 from events import WorkflowEventHandler, PhaseStatus
+from report_cache import ReportCache, normalize_angle
+from budget import RunBudget
+from documents import DocumentCache
+from evidence import EvidenceStore
+from plan_stream import JsonArrayStreamParser
+from workflow_graph import TaskGraph
+from speculation import SpeculativeResearch, active_speculation
+from scheduler import run_priority
+import metrics
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
+import contextvars
+import functools
+import threading
+import time
 
 def phase_1_fn(query, event_handler: Optional[WorkflowEventHandler] = None):
     if event_handler:
@@ -25,6 +39,44 @@ def phase_1_fn(query, event_handler: Optional[WorkflowEventHandler] = None):
 
     return response_json
 
+def phase_1_2_fn(query, event_handler: Optional[WorkflowEventHandler] = None):
+    """
+    Fused Phases 1 and 2: understand the query and, unless clarification is needed, plan it in one call.
+
+    Returns the Phase 1 understanding; when no clarification is needed it
+    also carries the Phase 2 "research_angles".
+    """
+    if event_handler:
+        event_handler.emit_phase("1", "Understanding Query", PhaseStatus.RUNNING)
+
+    prompt = prompt_1_2.format(user_query=query)
+    response = generate_response(messages=prepare_message(
+        user_message=prompt),
+        thinking_level="medium"
+        )
+
+    content = extract_content(response)
+    response_json = convert_response_to_json(content)
+    if response_json.get("needs_clarification", False):
+        # The plan is made after the clarification round instead
+        response_json.pop("research_angles", None)
+
+    if event_handler:
+        event_handler.emit_phase(
+            "1", "Understanding Query", PhaseStatus.COMPLETED,
+            message=f"Clarification needed: {response_json.get('needs_clarification', False)}"
+        )
+        if response_json.get("research_angles"):
+            # The plan came with the Phase 1 call (whose LLM time counts as Phase 1); keep the
+            # RUNNING/COMPLETED pair that the UI, the event stream and phase metrics expect
+            event_handler.emit_phase("2", "Research Planning", PhaseStatus.RUNNING)
+            event_handler.emit_phase(
+                "2", "Research Planning", PhaseStatus.COMPLETED,
+                message=f"Created {len(response_json['research_angles'])} research angles together with the query analysis"
+            )
+
+    return response_json
+
 def phase_1_1_fn(query, response_phase_1, user_answer: Optional[str] = None, event_handler: Optional[WorkflowEventHandler] = None):
     if event_handler:
         event_handler.emit_phase("1.1", "Clarification", PhaseStatus.RUNNING)
@@ -79,7 +131,7 @@ def phase_2_fn(query, response_phase_1, event_handler: Optional[WorkflowEventHan
 
     return response_json
 
-def phase_3_fn(query, response_phase_2, event_handler: Optional[WorkflowEventHandler] = None):
+def phase_3_fn(query, response_phase_2, event_handler: Optional[WorkflowEventHandler] = None, report_cache: Optional[ReportCache] = None, run_budget: Optional[RunBudget] = None, evidence: Optional[EvidenceStore] = None, research_round: int = 1):
     if event_handler:
         event_handler.emit_phase("3", "Research Execution", PhaseStatus.RUNNING)
 
@@ -88,48 +140,383 @@ def phase_3_fn(query, response_phase_2, event_handler: Optional[WorkflowEventHan
     else:
         angles = response_phase_2["new_angles"]
 
-    synthesis_info = ""
-    sources_used = []
+    evidence = evidence if evidence is not None else EvidenceStore()
     angles_investigated = []
+    if run_budget:
+        run_budget.add_angles(len(angles))
 
     for idx, d in enumerate(angles, 1):
-        if event_handler:
+        # Skip straight to synthesis once the run budget is spent
+        exhausted_reason = run_budget.exhausted_reason() if run_budget else None
+        if exhausted_reason:
+            if event_handler:
+                event_handler.emit_phase(
+                    "3", "Research Execution", PhaseStatus.RUNNING,
+                    message=f"{exhausted_reason}, skipping {len(angles) - idx + 1} remaining angles"
+                )
+            break
+
+        angles_investigated.append(d["angle"])
+        result = _investigate_angle(
+            query, d, f"{idx}/{len(angles)}", event_handler=event_handler, report_cache=report_cache,
+            run_budget=run_budget,
+        )
+        if result is None:
+            continue
+        response_json, fetched_urls = result
+
+        evidence.add_angle(
+            d["angle"],
+            response_json["final_summary"],
+            response_json["sources_used"],
+            fetched_urls=fetched_urls,
+            round=research_round,
+        )
+
+    if event_handler:
+        event_handler.emit_phase(
+            "3", "Research Execution", PhaseStatus.COMPLETED,
+            message=f"Investigated {len(angles_investigated)} angles, found {len(evidence.source_urls())} sources"
+        )
+
+    return evidence
+
+def _investigate_angle(query, d, label: str, event_handler: Optional[WorkflowEventHandler] = None, report_cache: Optional[ReportCache] = None, run_budget: Optional[RunBudget] = None):
+    """Research one angle (or reuse cached findings); returns (angle result JSON, fetched URLs), or None if cancelled."""
+    # Reuse findings researched speculatively while the user answered clarifying questions
+    speculation = active_speculation()
+    if speculation:
+        speculative = speculation.claim(d)
+        metrics.record_cache_lookup("speculative", speculative is not None)
+        if speculative:
+            if run_budget:
+                run_budget.add_angles(-1)
+            if event_handler:
+                event_handler.emit_phase(
+                    "3", "Research Execution", PhaseStatus.RUNNING,
+                    message=f"Reused speculative findings for angle {label}"
+                )
+            return speculative
+        if event_handler and speculation.rerunning(d):
             event_handler.emit_phase(
                 "3", "Research Execution", PhaseStatus.RUNNING,
-                message=f"Investigating angle {idx}/{len(angles)}: {d['angle']}"
+                message=f"Speculative findings for angle {label} stopped at the "
+                        f"{speculation.max_iterations}-iteration speculative limit; researching it again"
             )
 
-        angles_investigated.append(d["angle"])
+    if event_handler:
+        event_handler.emit_phase(
+            "3", "Research Execution", PhaseStatus.RUNNING,
+            message=f"Investigating angle {label}: {d['angle']}"
+        )
+
+    # Reuse a fresh summary of a near-identical angle from an earlier run
+    cached = report_cache.lookup_angle(d) if report_cache else None
+    if report_cache:
+        metrics.record_cache_lookup("angle", cached is not None)
+    fetched_urls = []
+    if cached:
+        response_json = cached["payload"]
+        if run_budget:
+            # This angle no longer draws from the shared budget
+            run_budget.add_angles(-1)
+        if event_handler:
+            event_handler.emit_phase(
+                "3", "Research Execution", PhaseStatus.RUNNING,
+                message=f"Reused cached findings for angle {label} (similarity {cached['similarity']:.2f})"
+            )
+    else:
         prompt = prompt_3.format(
             user_query=query,
             angle=d["angle"],
             success_criteria=d["success_criteria"],
+            local_search_tool=prompt_3_local_search if get_config().ENABLE_LOCAL_INDEX else "",
             )
 
         content = generate_response_with_fn_calls(
             [prepare_message(user_message = prompt)],
-            event_handler=event_handler
+            event_handler=event_handler,
+            budget=run_budget.allocate() if run_budget else None,
+            fetched_urls=fetched_urls
         )
+        if content is None:
+            # Cancelled before finishing (discarded speculation); there is nothing to parse or cache
+            return None
         response_json = convert_response_to_json(content)
-        synthesis_info = synthesis_info + "\n\n" + response_json["final_summary"]
-        sources_used.extend(response_json["sources_used"])
+        if report_cache:
+            report_cache.store_angle(d, response_json["final_summary"], response_json["sources_used"])
+
+    return response_json, fetched_urls
+
+def _investigate_angle_within_budget(query, d, label: str, event_handler: Optional[WorkflowEventHandler] = None, report_cache: Optional[ReportCache] = None, run_budget: Optional[RunBudget] = None):
+    """_investigate_angle for concurrently scheduled angles; returns None if the run budget is already spent."""
+    exhausted_reason = run_budget.exhausted_reason() if run_budget else None
+    if exhausted_reason:
+        if event_handler:
+            event_handler.emit_phase(
+                "3", "Research Execution", PhaseStatus.RUNNING,
+                message=f"{exhausted_reason}, skipping angle {label}"
+            )
+        if run_budget:
+            run_budget.add_angles(-1)
+        return None
+    return _investigate_angle(
+        query, d, label, event_handler=event_handler, report_cache=report_cache, run_budget=run_budget
+    )
+
+class _EventGate:
+    """
+    Event handler proxy that holds phase and tool events back until open().
+
+    Pipelined angles start while Phase 2 is still streaming; gating their
+    events keeps Phase 2 COMPLETED ahead of any Phase 3 event, which the UI
+    and the phase-duration metrics rely on.
+    """
+
+    def __init__(self, handler: WorkflowEventHandler):
+        self._handler = handler
+        self._held = []
+        self._open = False
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        return getattr(self._handler, name)
+
+    def emit_phase(self, *args, **kwargs):
+        self._emit("emit_phase", args, kwargs)
+
+    def emit_tool_call(self, *args, **kwargs):
+        self._emit("emit_tool_call", args, kwargs)
+
+    def _emit(self, method: str, args: tuple, kwargs: dict):
+        with self._lock:
+            if not self._open:
+                self._held.append((method, args, kwargs))
+                return
+        getattr(self._handler, method)(*args, **kwargs)
+
+    def open(self):
+        """Deliver the held events in order, then pass events straight through."""
+        with self._lock:
+            for method, args, kwargs in self._held:
+                getattr(self._handler, method)(*args, **kwargs)
+            self._held = []
+            self._open = True
+
+def phase_2_3_pipelined_fn(query, response_phase_1, event_handler: Optional[WorkflowEventHandler] = None, report_cache: Optional[ReportCache] = None, run_budget: Optional[RunBudget] = None):
+    """
+    Phases 2 and 3 overlapped: stream the research plan and start each angle as soon as it is parsed.
+
+    Angles run concurrently on up to PHASE_3_CONCURRENCY threads; their
+    findings are added to the evidence in plan order once all have finished.
+
+    Returns:
+        (plan JSON, EvidenceStore)
+    """
+    if event_handler:
+        event_handler.emit_phase("2", "Research Planning", PhaseStatus.RUNNING, message="Streaming research plan")
+
+    prompt = prompt_2.format(
+    topic = response_phase_1["topic"],
+    aspects = response_phase_1["aspects"],
+    constraints = response_phase_1["constraints"],
+    assumptions = response_phase_1["assumptions"],
+    )
+
+    executor = ThreadPoolExecutor(max_workers=get_config().PHASE_3_CONCURRENCY, thread_name_prefix="angle")
+    dispatched = {}  # normalized angle -> (angle, future), in dispatch order
+    angle_events = _EventGate(event_handler) if event_handler else None
+
+    def dispatch(d):
+        key = normalize_angle(d)
+        if key in dispatched:
+            return
+        if not dispatched and angle_events:
+            angle_events.emit_phase("3", "Research Execution", PhaseStatus.RUNNING)
+        if run_budget:
+            run_budget.add_angles(1)
+        # Each angle runs in a copy of this context so it sees the run's document cache;
+        # its LLM calls count towards Phase 3 even while its events are held back
+        context = contextvars.copy_context()
+        context.run(metrics.set_current_phase, "3")
+        future = executor.submit(
+            context.run, _investigate_angle_within_budget,
+            query, d, str(len(dispatched) + 1), angle_events, report_cache, run_budget,
+        )
+        dispatched[key] = (d, future)
+
+    try:
+        parser = JsonArrayStreamParser("research_angles")
+        chunks = []
+        for chunk in generate_response_stream(messages=prepare_message(user_message=prompt), thinking_level="medium"):
+            chunks.append(chunk)
+            for d in parser.feed(chunk):
+                dispatch(d)
+
+        response_json = convert_response_to_json("".join(chunks))
+        # Pick up any angle the incremental parser skipped or could not extract
+        plan_angles = response_json.get("research_angles", [])
+        for d in plan_angles:
+            dispatch(d)
+
+        if event_handler:
+            event_handler.emit_phase(
+                "2", "Research Planning", PhaseStatus.COMPLETED,
+                message=f"Created {len(dispatched)} research angles"
+            )
+            angle_events.open()
+
+        evidence = EvidenceStore()
+        plan_order = {normalize_angle(d): i for i, d in reversed(list(enumerate(plan_angles)))}
+        for key in sorted(dispatched, key=lambda key: plan_order.get(key, len(plan_order))):
+            d, future = dispatched[key]
+            result = future.result()
+            if result is None:
+                continue
+            angle_json, fetched_urls = result
+            evidence.add_angle(
+                d["angle"],
+                angle_json["final_summary"],
+                angle_json["sources_used"],
+                fetched_urls=fetched_urls,
+                round=1,
+            )
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    if event_handler:
+        event_handler.emit_phase(
+            "3", "Research Execution", PhaseStatus.COMPLETED,
+            message=f"Investigated {len(evidence.angle_names())} angles, found {len(evidence.source_urls())} sources"
+        )
+
+    return response_json, evidence
+
+def phase_3_4_graph_fn(query, response_phase_2, event_handler: Optional[WorkflowEventHandler] = None, report_cache: Optional[ReportCache] = None, run_budget: Optional[RunBudget] = None):
+    """
+    Phases 3 and 4 as a task graph instead of two barriers.
+
+    Every finished angle triggers a reflection over the evidence so far, and
+    gap-filling angles it proposes start while other angles are still
+    running. Reflections are coalesced: at most one runs at a time, and one
+    more runs after it if angles finished meanwhile, so the last reflection
+    always sees all evidence. At most GRAPH_MAX_GAP_ANGLES gap-filling angles
+    are added per run. Node timings and the critical path are attached to the
+    Phase 3 completion event.
+
+    Returns:
+        EvidenceStore
+    """
+    if event_handler:
+        event_handler.emit_phase("3", "Research Execution", PhaseStatus.RUNNING)
+
+    config = get_config()
+    graph = TaskGraph(max_workers=config.PHASE_3_CONCURRENCY)
+    evidence = EvidenceStore()
+    lock = threading.Lock()
+    in_progress = {}
+    known_angles = set()
+    angle_count = 0
+    reflection_count = 0
+    gap_angles = 0
+    reflecting = False
+    reflect_again = False
+
+    def add_angle(d, research_round, deps=()):
+        nonlocal angle_count
+        angle_count += 1
+        name = f"angle-{angle_count}"
+        known_angles.add(d["angle"].strip().lower())
+        in_progress[name] = d["angle"]
+        if run_budget:
+            run_budget.add_angles(1)
+        graph.add(
+            name,
+            functools.partial(
+                _investigate_angle_within_budget, query, d, str(angle_count), event_handler, report_cache,
+                run_budget,
+            ),
+            deps=deps,
+            on_done=functools.partial(angle_done, name, d, research_round),
+        )
+
+    def angle_done(name, d, research_round, result):
+        nonlocal reflecting, reflect_again
+        with lock:
+            del in_progress[name]
+            if result is not None:
+                angle_json, fetched_urls = result
+                evidence.add_angle(
+                    d["angle"],
+                    angle_json["final_summary"],
+                    angle_json["sources_used"],
+                    fetched_urls=fetched_urls,
+                    round=research_round,
+                )
+            start_reflection = not reflecting
+            reflecting = True
+            if not start_reflection:
+                reflect_again = True
+        if start_reflection:
+            add_reflection(after=name)
+
+    def add_reflection(after):
+        nonlocal reflection_count
+        reflection_count += 1
+        name = f"reflection-{reflection_count}"
+
+        def reflect():
+            with lock:
+                still_running = list(in_progress.values())
+            return phase_4_fn(query, evidence, event_handler=event_handler, angles_in_progress=still_running)
+
+        graph.add(name, reflect, deps=(after,), on_done=functools.partial(reflection_done, name))
+
+    def reflection_done(name, verdict):
+        nonlocal gap_angles, reflecting, reflect_again
+        with lock:
+            if not verdict.get("is_sufficient", False) and not (run_budget and run_budget.exhausted):
+                for d in verdict.get("new_angles", []):
+                    if gap_angles >= config.GRAPH_MAX_GAP_ANGLES:
+                        break
+                    if d["angle"].strip().lower() in known_angles:
+                        continue
+                    gap_angles += 1
+                    add_angle(d, research_round=2, deps=(name,))
+            again = reflect_again
+            reflect_again = False
+            reflecting = again
+        if again:
+            add_reflection(after=name)
+
+    with lock:
+        for d in response_phase_2["research_angles"]:
+            add_angle(d, research_round=1)
+    graph.run()
 
     if event_handler:
         event_handler.emit_phase(
             "3", "Research Execution", PhaseStatus.COMPLETED,
-            message=f"Investigated {len(angles_investigated)} angles, found {len(sources_used)} sources"
+            data={"graph": graph.timings(), "critical_path": graph.critical_path()},
+            message=f"Investigated {len(evidence.angle_names())} angles ({gap_angles} gap-filling), "
+                    f"found {len(evidence.source_urls())} sources"
         )
 
-    return synthesis_info, sources_used, angles_investigated
+    return evidence
 
-def phase_4_fn(query, angles_investigated, synthesis_info, event_handler: Optional[WorkflowEventHandler] = None):
+def phase_4_fn(query, evidence: EvidenceStore, event_handler: Optional[WorkflowEventHandler] = None, angles_in_progress: Optional[list] = None):
     if event_handler:
         event_handler.emit_phase("4", "Reflection", PhaseStatus.RUNNING)
 
+    config = get_config()
+    angles_investigated = evidence.angle_names()
+    if angles_in_progress:
+        # Incremental reflection: keep the model from proposing angles that are already underway
+        angles_investigated = f"{angles_investigated}\nStill being researched (do not propose again): {angles_in_progress}"
     prompt = prompt_4.format(
     user_query=query,
     angles_investigated=angles_investigated,
-    synthesized_info=synthesis_info,
+    synthesized_info=evidence.render_synthesis(max_chars=config.REFLECTION_MAX_CHARS),
     )
 
     response = generate_response(
@@ -139,6 +526,7 @@ def phase_4_fn(query, angles_investigated, synthesis_info, event_handler: Option
 
     content = extract_content(response)
     response_json = convert_response_to_json(content)
+    metrics.REFLECTIONS.inc(outcome="sufficient" if response_json.get("is_sufficient", False) else "more_research")
 
     if event_handler:
         is_sufficient = response_json.get("is_sufficient", False)
@@ -147,29 +535,39 @@ def phase_4_fn(query, angles_investigated, synthesis_info, event_handler: Option
 
     return response_json
 
-def phase_5_fn(query,synthesis_info,sources_used, event_handler: Optional[WorkflowEventHandler] = None):
+def phase_5_fn(query, evidence: EvidenceStore, event_handler: Optional[WorkflowEventHandler] = None):
     if event_handler:
         event_handler.emit_phase("5", "Final Report", PhaseStatus.RUNNING)
 
+    config = get_config()
     prompt = prompt_5.format(
         user_query=query,
-        synthesized_info=synthesis_info,
-        sources = sources_used
+        synthesized_info=evidence.render_synthesis(max_chars=config.REPORT_MAX_CHARS),
+        sources = evidence.render_sources(max_sources=config.REPORT_MAX_SOURCES)
         )
 
-    response = generate_response(
-        messages=prepare_message(user_message = prompt ),
-        thinking_level="medium",
-        )
+    if event_handler and event_handler.streams_report:
+        # Hand the report out as it is generated
+        chunks = []
+        for chunk in generate_response_stream(messages=prepare_message(user_message=prompt), thinking_level="medium"):
+            chunks.append(chunk)
+            event_handler.emit_report_chunk(chunk)
+        content = "".join(chunks)
+    else:
+        response = generate_response(
+            messages=prepare_message(user_message = prompt ),
+            thinking_level="medium",
+            )
 
-    content = extract_content(response)
+        content = extract_content(response)
 
     if event_handler:
         event_handler.emit_phase("5", "Final Report", PhaseStatus.COMPLETED)
 
     return content
 
-def run_worklow(query: str, user_clarification: Optional[str] = None, event_handler: Optional[WorkflowEventHandler] = None) -> str:
+def run_worklow(query: str, user_clarification: Optional[str] = None, event_handler: Optional[WorkflowEventHandler] = None,
+                priority: Optional[str] = None, config: Optional[Config] = None) -> str:
     """
     Run the complete research workflow.
 
@@ -177,46 +575,131 @@ def run_worklow(query: str, user_clarification: Optional[str] = None, event_hand
         query: User's research query
         user_clarification: Optional pre-provided clarification answers
         event_handler: Optional event handler for progress tracking
+        priority: Priority class of the run's LLM and tool calls ("interactive" by default, "batch" for bulk jobs)
+        config: Optional configuration for this run only (see Config.with_overrides); defaults to the process config
 
     Returns:
         Final markdown report
     """
-    # Phase 1: Understanding user query
-    response_json = phase_1_fn(query=query, event_handler=event_handler)
+    # Documents fetched or prefetched by any angle are shared for the rest of the run
+    try:
+        # Everything the run calls, including its worker threads, sees the run's configuration
+        with use_config(config), run_priority(priority), DocumentCache():
+            report = _run_phases(query, user_clarification, event_handler)
+    except Exception:
+        metrics.RUNS.inc(status="failed")
+        raise
+    metrics.RUNS.inc(status="completed")
+    return report
+
+def _run_phases(query: str, user_clarification: Optional[str], event_handler: Optional[WorkflowEventHandler]) -> str:
+    # Phase 1: Understanding user query (and planning, in fused mode)
+    if get_config().FUSED_PLANNING:
+        response_json = phase_1_2_fn(query=query, event_handler=event_handler)
+    else:
+        response_json = phase_1_fn(query=query, event_handler=event_handler)
+    plan = response_json if response_json.get("research_angles") else None
 
     # Phase 1.1: Human-in-the-loop clarification
-    if response_json["needs_clarification"]:
-        response_json = phase_1_1_fn(
-            query=query,
-            response_phase_1=response_json,
-            user_answer=user_clarification,
-            event_handler=event_handler
-        )
+    report_cache = ReportCache() if get_config().ENABLE_REPORT_CACHE else None
+    speculation = None
+    try:
+        if response_json["needs_clarification"]:
+            # No speculation when the assumed understanding already has a cached report:
+            # the clarified query will most likely be served from the cache as well
+            if (get_config().SPECULATIVE_RESEARCH and user_clarification is None
+                    and not (report_cache and report_cache.lookup_report(response_json))):
+                # Research on the stated assumptions while the user answers
+                speculation = SpeculativeResearch(
+                    query, response_json,
+                    plan_fn=lambda understanding: phase_2_fn(query=query, response_phase_1=understanding),
+                    investigate_fn=lambda d, budget: _investigate_angle(query, d, "(speculative)", run_budget=budget),
+                ).start()
+            response_json = phase_1_1_fn(
+                query=query,
+                response_phase_1=response_json,
+                user_answer=user_clarification,
+                event_handler=event_handler
+            )
+
+        # Serve a fresh report for a near-duplicate query understanding; returning cancels
+        # any speculation before it is adopted
+        understanding = response_json
+        if report_cache:
+            cached = report_cache.lookup_report(understanding)
+            metrics.record_cache_lookup("report", cached is not None)
+            if cached:
+                if event_handler:
+                    age_hours = (time.time() - cached["created_at"]) / 3600
+                    event_handler.emit_phase(
+                        "5", "Final Report", PhaseStatus.COMPLETED,
+                        message=f"Served cached report (similarity {cached['similarity']:.2f}, {age_hours:.1f}h old)"
+                    )
+                return cached["payload"]["report"]
+
+        if speculation:
+            clarified = response_json
+            plan = speculation.adopt(
+                clarified,
+                replan=lambda: phase_2_fn(query=query, response_phase_1=clarified, event_handler=event_handler),
+            )
+            if speculation.reused_plan and event_handler:
+                event_handler.emit_phase("2", "Research Planning", PhaseStatus.RUNNING)
+                event_handler.emit_phase(
+                    "2", "Research Planning", PhaseStatus.COMPLETED,
+                    message=f"Kept the speculative plan of {len(plan.get('research_angles', []))} research angles"
+                )
+
+        run_budget = RunBudget()
+
+        if get_config().ENABLE_GRAPH_SCHEDULER:
+            # Phase 2: Planning
+            plan = plan or phase_2_fn(query=query, response_phase_1=response_json, event_handler=event_handler)
+
+            # Phases 3 + 4: angles and incremental reflections on a task graph
+            evidence = phase_3_4_graph_fn(
+                query, plan, event_handler=event_handler, report_cache=report_cache, run_budget=run_budget
+            )
+        else:
+            evidence = _run_barrier_phases(query, response_json, event_handler, report_cache, run_budget, plan=plan)
 
-    # Phase 2: Planning
-    response_json = phase_2_fn(query=query, response_phase_1=response_json, event_handler=event_handler)
+        # Phase 5: Synthesizer
+        content = phase_5_fn(query, evidence, event_handler=event_handler)
 
-    # Phase 3: Execution and Tool Use
-    final_synthesis_info = ""
-    synthesis_info, sources_used, angles_investigated = phase_3_fn(
-        query, response_json, event_handler=event_handler
-    )
-    final_synthesis_info = synthesis_info
+        if report_cache:
+            report_cache.store_report(understanding, content)
+
+        return content
+    finally:
+        if speculation:
+            speculation.close()
+
+def _run_barrier_phases(query, response_phase_1, event_handler: Optional[WorkflowEventHandler], report_cache: Optional[ReportCache], run_budget: RunBudget, plan: Optional[dict] = None) -> EvidenceStore:
+    if plan is None and get_config().PIPELINE_PLANNING:
+        # Phases 2 + 3: research starts while the plan is still streaming
+        response_json, evidence = phase_2_3_pipelined_fn(
+            query, response_phase_1, event_handler=event_handler, report_cache=report_cache, run_budget=run_budget
+        )
+    else:
+        # Phase 2: Planning (already done by the fused Phase 1 call when plan is given)
+        response_json = plan or phase_2_fn(query=query, response_phase_1=response_phase_1, event_handler=event_handler)
+
+        # Phase 3: Execution and Tool Use
+        evidence = phase_3_fn(
+            query, response_json, event_handler=event_handler, report_cache=report_cache, run_budget=run_budget
+        )
 
     # Phase 4: Reflection
-    response_json = phase_4_fn(query, angles_investigated, synthesis_info, event_handler=event_handler)
+    response_json = phase_4_fn(query, evidence, event_handler=event_handler)
 
-    if not response_json["is_sufficient"]:
+    if not response_json["is_sufficient"] and not run_budget.exhausted:
         # Go back to phase 3 with new angles
-        synthesis_info, sources_used, angles_investigated = phase_3_fn(
-            query, response_json, event_handler=event_handler
+        phase_3_fn(
+            query, response_json, event_handler=event_handler, report_cache=report_cache, run_budget=run_budget,
+            evidence=evidence, research_round=2
         )
-        final_synthesis_info = final_synthesis_info + "\n\n" + synthesis_info
-
-    # Phase 5: Synthesizer
-    content = phase_5_fn(query, final_synthesis_info, sources_used, event_handler=event_handler)
 
-    return content
+    return evidence
 
 def main():
     """CLI entry point."""
@@ -229,6 +712,9 @@ def main():
         return
 
     print("Research Agent - CLI Mode")
+    metrics_port = metrics.start_metrics_server()
+    if metrics_port:
+        print(f"Metrics: http://{config.METRICS_HOST}:{metrics_port}/metrics")
     query = input("Enter your research query: ")
 
     # Use default event handler (console output)
@@ -0,0 +1,191 @@
+"""Process-wide metrics registry with a Prometheus text-format /metrics endpoint."""
+import contextvars
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+from config import get_config
+
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+ITERATION_BUCKETS = (1, 2, 3, 5, 8, 12, 16, 20, 30)
+
+_current_phase = contextvars.ContextVar("current_phase", default="none")
+
+
+def set_current_phase(phase: str):
+    """Label subsequent LLM calls in this context with the given workflow phase."""
+    _current_phase.set(phase)
+
+
+def current_phase() -> str:
+    return _current_phase.get()
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_series(key, value))
+        return lines
+
+    def _render_series(self, key: tuple, value) -> list:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {value}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [[0] * len(self.buckets), 0, 0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += 1
+            series[2] += value
+
+    def _render_series(self, key: tuple, series) -> list:
+        bucket_counts, count, total = series
+        lines = []
+        for bound, n in list(zip(self.buckets, bucket_counts)) + [("+Inf", count)]:
+            le = 'le="%s"' % bound
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {n}")
+        lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together in Prometheus text format."""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+LLM_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "research_llm_request_seconds", "Latency of generateContent calls by workflow phase", ("phase",)))
+LLM_TOKENS = REGISTRY.register(Counter(
+    "research_llm_tokens_total", "Tokens consumed by workflow phase and kind (prompt, cached, output, thinking)",
+    ("phase", "kind")))
+LLM_ERRORS = REGISTRY.register(Counter(
+    "research_llm_errors_total", "Failed LLM calls by workflow phase", ("phase",)))
+TOOL_CALLS = REGISTRY.register(Counter(
+    "research_tool_calls_total", "Tool calls by tool and outcome (ok, error)", ("tool", "outcome")))
+TOOL_SECONDS = REGISTRY.register(Histogram(
+    "research_tool_seconds", "Tool call latency by tool", ("tool",)))
+CACHE_LOOKUPS = REGISTRY.register(Counter(
+    "research_cache_lookups_total", "Cache lookups by cache and result (hit, miss)", ("cache", "result")))
+ANGLE_ITERATIONS = REGISTRY.register(Histogram(
+    "research_angle_iterations", "Tool-loop iterations per investigated angle", (), ITERATION_BUCKETS))
+REFLECTIONS = REGISTRY.register(Counter(
+    "research_reflections_total", "Reflection outcomes (sufficient, more_research)", ("outcome",)))
+PHASE_SECONDS = REGISTRY.register(Histogram(
+    "research_phase_seconds", "Wall-clock duration of workflow phases", ("phase",)))
+RUNS = REGISTRY.register(Counter(
+    "research_runs_total", "Finished workflow runs by status (completed, failed)", ("status",)))
+SCHEDULER_WAIT_SECONDS = REGISTRY.register(Histogram(
+    "research_scheduler_wait_seconds", "Queue wait for an upstream slot by resource (llm, tool) and priority class",
+    ("resource", "priority")))
+SCHEDULER_QUEUED = REGISTRY.register(Gauge(
+    "research_scheduler_queued", "Calls waiting for an upstream slot by resource", ("resource",)))
+
+
+def record_cache_lookup(cache: str, hit: bool):
+    CACHE_LOOKUPS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server: Optional[ThreadingHTTPServer] = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port_offset: int = 0) -> Optional[int]:
+    """Serve /metrics on METRICS_PORT + port_offset in a daemon thread (once per process).
+
+    Returns the port, or None when METRICS_PORT is unset (0).
+    """
+    global _server
+    config = get_config()
+    if not config.METRICS_PORT:
+        return None
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((config.METRICS_HOST, config.METRICS_PORT + port_offset), _MetricsHandler)
+            threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+        return _server.server_address[1]
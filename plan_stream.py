@@ -0,0 +1,63 @@
+"""Incremental parsing of a streamed JSON research plan."""
+import json
+import re
+
+
+class JsonArrayStreamParser:
+    """
+    Extract the objects of one JSON array field while the document is still streaming.
+
+    Text is fed in arbitrary chunks; every object of the array is returned by
+    feed() as soon as its closing brace arrives, without waiting for the rest
+    of the document. Strings and escapes are tracked so braces inside values
+    don't confuse the scan.
+    """
+
+    def __init__(self, key: str):
+        self._key_pattern = re.compile(r'"%s"\s*:\s*\[' % re.escape(key))
+        self._buffer = ""
+        self._pos = None  # Scan position, set once the array has opened
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._object_start = None
+        self.finished = False
+
+    def feed(self, text: str) -> list:
+        """Add streamed text and return the array objects completed by it."""
+        self._buffer += text
+        if self._pos is None:
+            match = self._key_pattern.search(self._buffer)
+            if not match:
+                return []
+            self._pos = match.end()
+
+        objects = []
+        buffer = self._buffer
+        while self._pos < len(buffer) and not self.finished:
+            char = buffer[self._pos]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                if self._depth == 0 and char == "{":
+                    self._object_start = self._pos
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth < 0:
+                    self.finished = True
+                elif self._depth == 0 and char == "}" and self._object_start is not None:
+                    try:
+                        objects.append(json.loads(buffer[self._object_start:self._pos + 1]))
+                    except json.JSONDecodeError:
+                        pass
+                    self._object_start = None
+            self._pos += 1
+        return objects
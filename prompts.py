@@ -22,6 +22,40 @@ Respond with ONLY valid JSON:
 }}
 """
 
+prompt_1_2 = """You are a research assistant analyzing a query and, if it is clear, planning the research in the same step.
+
+Analyze this query and extract:
+1. The main topic
+2. Specific aspects the user wants covered
+3. Any constraints (time period, depth, source types)
+4. Whether clarification is needed (only if genuinely ambiguous)
+
+If clarification is needed, ask up to 3 focused questions and leave research_angles empty.
+If not needed, state your assumptions clearly and create 3-6 distinct research angles that collectively cover the query. Each angle should be:
+- Specific enough to guide a focused search
+- Non-overlapping with other angles
+- Answerable through research (not opinion)
+
+Query: {user_query}
+
+Respond with ONLY valid JSON:
+{{
+    "topic": "main subject",
+    "aspects": ["specific areas to cover"],
+    "constraints": ["any limitations"],
+    "needs_clarification": true/false,
+    "clarifying_questions": ["if needed"],
+    "assumptions": ["assumptions you're making"],
+    "research_angles": [
+        {{
+            "angle": "<specific question or area to investigate>",
+            "why_needed": "<how this contributes to answering the overall query>",
+            "success_criteria": "<what specific information or evidence would complete this angle>"
+        }}
+    ]
+}}
+"""
+
 prompt_1_1 = """You are a research assistant finalizing your understanding of a query.
 
 Original query: {user_query}
@@ -85,8 +119,10 @@ Use the available tools to gather information. When success criteria is met, sto
 Available tools:
 
 - arxiv_search: Search academic papers on arXiv
-- fetch_url: Fetch content from URLs
-
+- arxiv_papers: Get full abstracts for many arXiv papers in one call
+- multi_search: Run several queries at once on the web and arXiv and get one merged, ranked result list (prefer this over repeated single searches)
+- fetch_url: Fetch content from URLs (for arXiv papers, pass section="outline" first and then read only the sections you need)
+{local_search_tool}
 If you have gathered enough information, respond with ONLY valid JSON:
 {{
     "final_summary": "<summarize all relevant information for this angle>",
@@ -96,6 +132,10 @@ If you have gathered enough information, respond with ONLY valid JSON:
 Otherwise, continue using tools to gather more information.
 """
 
+# Listed in prompt_3 only when ENABLE_LOCAL_INDEX exposes the tool
+prompt_3_local_search = """- local_search: Search documents fetched during earlier research runs (check it before searching the web again)
+"""
+
 prompt_4 = """You are a research assistant reflecting on the research quality.
 
 Original Query: {user_query}
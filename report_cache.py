@@ -0,0 +1,214 @@
+"""Semantic cache of research reports and angle summaries keyed on query understanding."""
+import json
+import math
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+from typing import Optional
+
+from config import get_config
+
+_STOPWORDS = frozenset("""
+a an and are as at be by for from how in into is it of on or over the this to
+vs what which with about latest recent new current advances developments
+""".split())
+
+_TIME_SENSITIVE_WORDS = ("latest", "recent", "current", "today", "news", "this year", "state of the art")
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def _tokenize(text: str) -> list:
+    tokens = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        if token in _STOPWORDS or len(token) < 2:
+            continue
+        # Cheap plural folding so "computers" matches "computer"
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+def normalize_understanding(understanding: dict) -> str:
+    """Flatten the Phase 1 understanding (topic, aspects, constraints) into a cache key text."""
+    parts = [str(understanding.get("topic", ""))]
+    for field in ("aspects", "constraints"):
+        value = understanding.get(field) or []
+        parts.extend(str(v) for v in (value if isinstance(value, list) else [value]))
+    return " ".join(" ".join(parts).lower().split())
+
+
+def normalize_angle(angle: dict) -> str:
+    """Flatten a research angle into a cache key text."""
+    return " ".join(f"{angle.get('angle', '')} {angle.get('success_criteria', '')}".lower().split())
+
+
+def is_time_sensitive(text: str) -> bool:
+    text = text.lower()
+    return any(word in text for word in _TIME_SENSITIVE_WORDS)
+
+
+class TfidfIndex:
+    """Small in-memory TF-IDF index with cosine similarity lookup."""
+
+    def __init__(self):
+        self._docs = {}  # id -> term counts
+        self._df = Counter()
+
+    def __len__(self):
+        return len(self._docs)
+
+    def add(self, doc_id: str, text: str):
+        if doc_id in self._docs:
+            self.remove(doc_id)
+        counts = Counter(_tokenize(text))
+        self._docs[doc_id] = counts
+        self._df.update(counts.keys())
+
+    def remove(self, doc_id: str):
+        counts = self._docs.pop(doc_id, None)
+        if counts:
+            self._df.subtract(counts.keys())
+
+    def _vector(self, counts: Counter) -> dict:
+        n = len(self._docs) + 1
+        vector = {t: (1 + math.log(c)) * (math.log(n / (1 + self._df[t])) + 1) for t, c in counts.items()}
+        norm = math.sqrt(sum(w * w for w in vector.values())) or 1.0
+        return {t: w / norm for t, w in vector.items()}
+
+    def most_similar(self, text: str, limit: int = 5) -> list:
+        """Return [(doc_id, similarity)] sorted by descending cosine similarity."""
+        query = self._vector(Counter(_tokenize(text)))
+        if not query:
+            return []
+        scored = []
+        for doc_id, counts in self._docs.items():
+            if not query.keys() & counts.keys():
+                continue
+            doc = self._vector(counts)
+            scored.append((doc_id, sum(w * doc.get(t, 0.0) for t, w in query.items())))
+        scored.sort(key=lambda item: item[1], reverse=True)
+        return scored[:limit]
+
+
+class ReportCache:
+    """
+    Disk-backed cache of final reports and per-angle summaries.
+
+    Entries are matched by TF-IDF similarity of the normalized understanding
+    (for reports) or angle text (for angle summaries), and only served while
+    fresh: time-sensitive queries ("latest", "recent", ...) expire sooner.
+    Expired entry files are deleted while loading, and only the newest
+    REPORT_CACHE_MAX_ENTRIES entries are kept.
+    """
+
+    def __init__(self, directory: Optional[Path] = None):
+        config = get_config()
+        self.directory = Path(directory or config.REPORT_CACHE_DIR)
+        self.report_similarity = config.REPORT_CACHE_SIMILARITY
+        self.angle_similarity = config.ANGLE_CACHE_SIMILARITY
+        self.max_age = config.REPORT_CACHE_MAX_AGE_HOURS * 3600
+        self.time_sensitive_max_age = config.REPORT_CACHE_TIME_SENSITIVE_MAX_AGE_HOURS * 3600
+        self.max_entries = config.REPORT_CACHE_MAX_ENTRIES
+        self._entries = {}
+        self._indexes = {"report": TfidfIndex(), "angle": TfidfIndex()}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not self.directory.exists():
+            return
+        longest_age = max(self.max_age, self.time_sensitive_max_age)
+        now = time.time()
+        for path in self.directory.glob("*.json"):
+            try:
+                # Files older than any entry may live can be dropped without parsing them
+                if now - path.stat().st_mtime > longest_age:
+                    path.unlink()
+                    continue
+                with open(path, encoding="utf-8") as f:
+                    entry = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                continue
+            if self._is_fresh(entry):
+                self._add(entry)
+            else:
+                self._delete_file(entry["id"])
+        self._evict()
+
+    def _add(self, entry: dict):
+        self._entries[entry["id"]] = entry
+        self._indexes[entry["kind"]].add(entry["id"], entry["key"])
+
+    def _evict(self):
+        """Drop the oldest entries beyond max_entries from memory and disk."""
+        excess = len(self._entries) - self.max_entries
+        if excess <= 0:
+            return
+        oldest = sorted(self._entries.values(), key=lambda e: e["created_at"])[:excess]
+        for entry in oldest:
+            del self._entries[entry["id"]]
+            self._indexes[entry["kind"]].remove(entry["id"])
+            self._delete_file(entry["id"])
+
+    def _delete_file(self, entry_id: str):
+        try:
+            (self.directory / f"{entry_id}.json").unlink()
+        except OSError:
+            pass
+
+    def _is_fresh(self, entry: dict) -> bool:
+        max_age = self.time_sensitive_max_age if entry.get("time_sensitive") else self.max_age
+        return time.time() - entry["created_at"] <= max_age
+
+    def _lookup(self, kind: str, key: str, threshold: float) -> Optional[dict]:
+        with self._lock:
+            for doc_id, similarity in self._indexes[kind].most_similar(key):
+                if similarity < threshold:
+                    break
+                entry = self._entries[doc_id]
+                if self._is_fresh(entry):
+                    return dict(entry, similarity=similarity)
+        return None
+
+    def _store(self, kind: str, key: str, payload: dict):
+        entry = {
+            "id": uuid.uuid4().hex,
+            "kind": kind,
+            "key": key,
+            "time_sensitive": is_time_sensitive(key),
+            "created_at": time.time(),
+            "payload": payload,
+        }
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, self.directory / f"{entry['id']}.json")
+        with self._lock:
+            self._add(entry)
+            self._evict()
+
+    def lookup_report(self, understanding: dict) -> Optional[dict]:
+        """Return a fresh cached report entry for a similar understanding, or None."""
+        return self._lookup("report", normalize_understanding(understanding), self.report_similarity)
+
+    def store_report(self, understanding: dict, report: str):
+        self._store("report", normalize_understanding(understanding), {"report": report})
+
+    def lookup_angle(self, angle: dict) -> Optional[dict]:
+        """Return a fresh cached summary entry for a similar research angle, or None."""
+        return self._lookup("angle", normalize_angle(angle), self.angle_similarity)
+
+    def store_angle(self, angle: dict, final_summary: str, sources_used: list):
+        self._store("angle", normalize_angle(angle), {
+            "angle": angle.get("angle", ""),
+            "final_summary": final_summary,
+            "sources_used": sources_used,
+        })
@@ -0,0 +1,320 @@
+"""Priority-aware admission of upstream LLM and tool calls shared by all runs and processes."""
+import contextlib
+import contextvars
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+from pathlib import Path
+from typing import Optional
+
+import metrics
+from config import get_config
+
+DEFAULT_PRIORITY = "interactive"
+
+# Waiters refresh seen_at on every poll; ones silent this long belong to a dead process elsewhere
+_STALE_WAITER_SECONDS = 60
+
+_current_priority = contextvars.ContextVar("current_priority", default=DEFAULT_PRIORITY)
+
+
+def current_priority() -> str:
+    """Return the priority class of upstream calls made in this context."""
+    return _current_priority.get()
+
+
+@contextlib.contextmanager
+def run_priority(priority: Optional[str]):
+    """Submit the upstream calls of this context (and threads copying it) with the given priority class."""
+    token = _current_priority.set(priority or DEFAULT_PRIORITY)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def parse_weights(spec: str) -> dict:
+    """Parse "interactive=4,batch=1" into {"interactive": 4.0, "batch": 1.0}."""
+    weights = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        name, _, weight = item.partition("=")
+        weights[name.strip()] = max(float(weight or 1), 0.001)
+    return weights
+
+
+def _process_alive(pid: int) -> bool:
+    if pid == os.getpid():
+        return True
+    if os.name == "nt":
+        # Signal 0 is CTRL_C_EVENT on Windows; rely on the hold and staleness limits there
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class FairScheduler:
+    """
+    Admit calls to one upstream resource through a fixed number of slots.
+
+    Slots and waiting calls live in a SQLite database shared by every process
+    pointing at the same path (the SSE service, CLI runs, queue workers and
+    batch runs), so interactive sessions are prioritized over batch work no
+    matter which process it runs in. Calls wait in one FIFO per priority
+    class and free slots go to the waiting call with the smallest start-time
+    fair queuing finish tag, so under contention each class gets slots in
+    proportion to its weight (interactive sessions are not stuck behind a
+    backlog of batch calls, and batch still makes progress). A call that has
+    waited longer than starvation_seconds is admitted ahead of any tag order.
+
+    Whichever process frees or requests a slot admits the next waiting calls;
+    waiters in this process are woken at once, waiters in other processes see
+    their admission on their next poll. Slots and waits left behind by dead
+    processes on this host are reclaimed, and any slot held longer than
+    max_hold_seconds is presumed abandoned. Queue wait per class is exported
+    as a metric and summarized across processes by stats().
+    """
+
+    def __init__(self, resource: str, slots: int, weights: dict, starvation_seconds: float,
+                 path: Optional[Path] = None, poll_seconds: Optional[float] = None,
+                 max_hold_seconds: Optional[float] = None):
+        config = get_config()
+        self.resource = resource
+        self.slots = slots
+        self.weights = weights
+        self.starvation_seconds = starvation_seconds
+        self.path = Path(path or config.SCHEDULER_PATH)
+        self.poll_seconds = poll_seconds or config.SCHEDULER_POLL_SECONDS
+        self.max_hold_seconds = max_hold_seconds or config.SCHEDULER_MAX_HOLD_SECONDS
+        self._host = socket.gethostname()
+        self._events = {}  # waiter id -> threading.Event of waiters in this process
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with contextlib.closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS waiters (
+                    id TEXT PRIMARY KEY, resource TEXT NOT NULL, priority TEXT NOT NULL,
+                    start_tag REAL NOT NULL, finish_tag REAL NOT NULL, enqueued_at REAL NOT NULL,
+                    seen_at REAL NOT NULL, host TEXT, pid INTEGER
+                );
+                CREATE INDEX IF NOT EXISTS idx_waiters_resource ON waiters (resource, enqueued_at);
+                CREATE TABLE IF NOT EXISTS holders (
+                    id TEXT PRIMARY KEY, resource TEXT NOT NULL, priority TEXT NOT NULL,
+                    acquired_at REAL NOT NULL, host TEXT, pid INTEGER
+                );
+                CREATE INDEX IF NOT EXISTS idx_holders_resource ON holders (resource);
+                CREATE TABLE IF NOT EXISTS classes (
+                    resource TEXT NOT NULL, priority TEXT NOT NULL, last_finish REAL NOT NULL DEFAULT 0,
+                    calls INTEGER NOT NULL DEFAULT 0, total_wait REAL NOT NULL DEFAULT 0,
+                    max_wait REAL NOT NULL DEFAULT 0, PRIMARY KEY (resource, priority)
+                );
+                CREATE TABLE IF NOT EXISTS clocks (resource TEXT PRIMARY KEY, virtual_time REAL NOT NULL);
+            """)
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit mode; admission runs in explicit BEGIN IMMEDIATE transactions
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        with contextlib.closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    @contextlib.contextmanager
+    def slot(self, priority: Optional[str] = None):
+        """Hold one slot of the resource for the duration of the block."""
+        priority = priority or current_priority()
+        waiter_id, enqueued_at = self._wait(priority)
+        waited = time.time() - enqueued_at
+        metrics.SCHEDULER_WAIT_SECONDS.observe(waited, resource=self.resource, priority=priority)
+        try:
+            yield
+        finally:
+            self._release(waiter_id)
+
+    def _wait(self, priority: str) -> tuple:
+        waiter_id = uuid.uuid4().hex
+        event = threading.Event()
+        with self._lock:
+            self._events[waiter_id] = event
+        try:
+            with self._transaction() as conn:
+                enqueued_at = self._enqueue(conn, waiter_id, priority)
+                admitted = self._dispatch(conn, waiter_id)
+            while not admitted:
+                event.wait(self.poll_seconds)
+                with self._transaction() as conn:
+                    seen = conn.execute("UPDATE waiters SET seen_at = ? WHERE id = ?", (time.time(), waiter_id))
+                    admitted = self._dispatch(conn, waiter_id)
+                    if not admitted and not seen.rowcount:
+                        # Reaped as stale (e.g. after a long stall); queue again
+                        self._enqueue(conn, waiter_id, priority)
+        except BaseException:
+            self._release(waiter_id)
+            raise
+        finally:
+            with self._lock:
+                self._events.pop(waiter_id, None)
+        return waiter_id, enqueued_at
+
+    def _release(self, waiter_id: str):
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM waiters WHERE id = ?", (waiter_id,))
+            conn.execute("DELETE FROM holders WHERE id = ?", (waiter_id,))
+            self._dispatch(conn)
+
+    def _enqueue(self, conn: sqlite3.Connection, waiter_id: str, priority: str) -> float:
+        row = conn.execute("SELECT virtual_time FROM clocks WHERE resource = ?", (self.resource,)).fetchone()
+        virtual_time = row[0] if row else 0.0
+        row = conn.execute(
+            "SELECT last_finish FROM classes WHERE resource = ? AND priority = ?", (self.resource, priority)
+        ).fetchone()
+        start_tag = max(virtual_time, row[0] if row else 0.0)
+        finish_tag = start_tag + 1.0 / self.weights.get(priority, 1.0)
+        conn.execute(
+            "INSERT INTO classes (resource, priority, last_finish) VALUES (?, ?, ?) "
+            "ON CONFLICT (resource, priority) DO UPDATE SET last_finish = excluded.last_finish",
+            (self.resource, priority, finish_tag),
+        )
+        now = time.time()
+        conn.execute(
+            "INSERT INTO waiters (id, resource, priority, start_tag, finish_tag, enqueued_at, seen_at, host, pid) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (waiter_id, self.resource, priority, start_tag, finish_tag, now, now, self._host, os.getpid()),
+        )
+        return now
+
+    def _dispatch(self, conn: sqlite3.Connection, waiter_id: Optional[str] = None) -> bool:
+        """Admit waiting calls into free slots; returns whether waiter_id holds a slot."""
+        # Caller holds the write transaction
+        self._reap(conn)
+        busy = conn.execute("SELECT COUNT(*) FROM holders WHERE resource = ?", (self.resource,)).fetchone()[0]
+        if busy < self.slots:
+            waiting = conn.execute(
+                "SELECT id, priority, start_tag, finish_tag, enqueued_at FROM waiters "
+                "WHERE resource = ? ORDER BY enqueued_at",
+                (self.resource,),
+            ).fetchall()
+            queues = {}
+            for waiter in waiting:
+                queues.setdefault(waiter[1], deque()).append(waiter)
+            now = time.time()
+            for _ in range(self.slots - busy):
+                waiter = self._next_waiter(queues, now)
+                if waiter is None:
+                    break
+                queues[waiter[1]].popleft()
+                self._admit(conn, waiter, now)
+            metrics.SCHEDULER_QUEUED.set(sum(len(queue) for queue in queues.values()), resource=self.resource)
+        if waiter_id is None:
+            return False
+        return conn.execute("SELECT 1 FROM holders WHERE id = ?", (waiter_id,)).fetchone() is not None
+
+    def _next_waiter(self, queues: dict, now: float) -> Optional[tuple]:
+        heads = [queue[0] for queue in queues.values() if queue]
+        if not heads:
+            return None
+        starved = [w for w in heads if now - w[4] >= self.starvation_seconds]
+        if starved:
+            return min(starved, key=lambda w: w[4])
+        return min(heads, key=lambda w: (w[3], w[4]))
+
+    def _admit(self, conn: sqlite3.Connection, waiter: tuple, now: float):
+        waiter_id, priority, start_tag, _, enqueued_at = waiter
+        waited = now - enqueued_at
+        # The slot belongs to the waiting call's process, whichever process admits it
+        conn.execute(
+            "INSERT INTO holders (id, resource, priority, acquired_at, host, pid) "
+            "SELECT id, resource, priority, ?, host, pid FROM waiters WHERE id = ?",
+            (now, waiter_id),
+        )
+        conn.execute("DELETE FROM waiters WHERE id = ?", (waiter_id,))
+        conn.execute(
+            "INSERT INTO clocks (resource, virtual_time) VALUES (?, ?) "
+            "ON CONFLICT (resource) DO UPDATE SET virtual_time = MAX(virtual_time, excluded.virtual_time)",
+            (self.resource, start_tag),
+        )
+        conn.execute(
+            "UPDATE classes SET calls = calls + 1, total_wait = total_wait + ?, max_wait = MAX(max_wait, ?) "
+            "WHERE resource = ? AND priority = ?",
+            (waited, waited, self.resource, priority),
+        )
+        with self._lock:
+            event = self._events.get(waiter_id)
+        if event:
+            event.set()
+
+    def _reap(self, conn: sqlite3.Connection):
+        # Caller holds the write transaction
+        now = time.time()
+        conn.execute("DELETE FROM holders WHERE acquired_at < ?", (now - self.max_hold_seconds,))
+        conn.execute("DELETE FROM waiters WHERE seen_at < ?", (now - max(self.poll_seconds * 20, _STALE_WAITER_SECONDS),))
+        pids = conn.execute(
+            "SELECT pid FROM holders WHERE host = ? UNION SELECT pid FROM waiters WHERE host = ?",
+            (self._host, self._host),
+        ).fetchall()
+        for (pid,) in pids:
+            if not _process_alive(pid):
+                conn.execute("DELETE FROM holders WHERE host = ? AND pid = ?", (self._host, pid))
+                conn.execute("DELETE FROM waiters WHERE host = ? AND pid = ?", (self._host, pid))
+
+    def stats(self) -> dict:
+        """Per priority class, across all processes: calls admitted, mean and max queue wait in seconds, and calls waiting now."""
+        with contextlib.closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT c.priority, c.calls, c.total_wait, c.max_wait, "
+                "(SELECT COUNT(*) FROM waiters w WHERE w.resource = c.resource AND w.priority = c.priority) "
+                "FROM classes c WHERE c.resource = ?",
+                (self.resource,),
+            ).fetchall()
+        return {
+            priority: {
+                "calls": calls,
+                "mean_wait_seconds": total / calls if calls else 0.0,
+                "max_wait_seconds": longest,
+                "queued": queued,
+            }
+            for priority, calls, total, longest, queued in rows
+        }
+
+
+_schedulers = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_scheduler(resource: str) -> Optional[FairScheduler]:
+    """Return the scheduler for "llm" or "tool" calls, or None when scheduling is disabled."""
+    config = get_config()
+    if not config.ENABLE_SCHEDULER:
+        return None
+    with _schedulers_lock:
+        scheduler = _schedulers.get(resource)
+        if scheduler is None or scheduler.path != Path(config.SCHEDULER_PATH):
+            slots = config.SCHEDULER_LLM_SLOTS if resource == "llm" else config.SCHEDULER_TOOL_SLOTS
+            _schedulers[resource] = FairScheduler(
+                resource, slots, parse_weights(config.SCHEDULER_WEIGHTS), config.SCHEDULER_STARVATION_SECONDS
+            )
+        return _schedulers[resource]
+
+
+def scheduled(resource: str, priority: Optional[str] = None):
+    """Context manager holding a slot of the resource, or doing nothing when scheduling is disabled."""
+    scheduler = get_scheduler(resource)
+    return scheduler.slot(priority) if scheduler else contextlib.nullcontext()
@@ -0,0 +1,347 @@
+"""ASGI service that starts research workflows and streams their progress over SSE.
+
+Run with any ASGI server, e.g. ``uvicorn server:app``.
+
+Endpoints:
+    POST /runs                  {"query": ..., "clarification": ..., "priority": "interactive" | "batch",
+                                 "config": {"GEMINI_MODEL": ..., ...}} -> {"run_id": ...}
+                                "config" overrides settings in RUN_CONFIG_SETTINGS for this run only.
+    GET  /runs/{run_id}         Run status, plus the report once completed
+    GET  /runs/{run_id}/events  Server-sent events: phase, tool_call, report (chunks as Phase 5 generates
+                                them), done/error.
+                                Late subscribers replay the buffered events first; resume with
+                                the Last-Event-ID header or ?after=<id>.
+    GET  /metrics               Prometheus text-format metrics of this process
+"""
+import asyncio
+import contextvars
+import json
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from typing import Optional
+from urllib.parse import parse_qs
+
+import metrics
+from config import Config, get_config, ConfigurationError
+from events import WorkflowEventHandler, PhaseEvent, ToolCallEvent
+from scheduler import DEFAULT_PRIORITY, parse_weights
+from worker import HEADLESS_CLARIFICATION
+
+_FINISHED = object()
+
+# Settings a client may override per run; paths, caches and process-wide resources stay server-side
+RUN_CONFIG_SETTINGS = (
+    "GEMINI_API_KEY", "TAVILY_API_KEY", "GEMINI_MODEL", "THINKING_LEVEL", "MAX_TOOL_ITERATIONS",
+    "RUN_MAX_SECONDS", "RUN_MAX_TOKENS", "RUN_MAX_TOOL_ITERATIONS", "ANGLE_MAX_SECONDS", "ANGLE_MAX_TOKENS",
+    "NO_PROGRESS_TURN_LIMIT", "FUSED_PLANNING", "SPECULATIVE_RESEARCH", "PIPELINE_PLANNING",
+    "PHASE_3_CONCURRENCY", "ENABLE_GRAPH_SCHEDULER", "GRAPH_MAX_GAP_ANGLES", "SEARCH_RAW_CONTENT",
+)
+
+
+class RunStream:
+    """
+    Buffered event stream of one workflow run with fan-out to subscribers.
+
+    Every event is encoded to an SSE frame once and the same bytes are
+    handed to all subscribers. All mutation happens on the event loop
+    thread; workflow threads publish through publish_threadsafe().
+    """
+
+    def __init__(self, run_id: str, query: str, loop: asyncio.AbstractEventLoop):
+        self.run_id = run_id
+        self.query = query
+        self.loop = loop
+        self.status = "running"
+        self.report: Optional[str] = None
+        self.error: Optional[str] = None
+        self.frames = []
+        self.subscribers = set()
+        self.streamed_report_chars = 0
+
+    @property
+    def finished(self) -> bool:
+        return self.status != "running"
+
+    def publish(self, kind: str, data: dict):
+        event_id = len(self.frames) + 1
+        frame = f"id: {event_id}\nevent: {kind}\ndata: {json.dumps(data, default=str)}\n\n".encode("utf-8")
+        self.frames.append(frame)
+        for queue in self.subscribers:
+            queue.put_nowait(frame)
+
+    def publish_threadsafe(self, kind: str, data: dict):
+        self.loop.call_soon_threadsafe(self.publish, kind, data)
+
+    def publish_report_chunk(self, text: str):
+        self.publish("report", {"offset": self.streamed_report_chars, "text": text})
+        self.streamed_report_chars += len(text)
+
+    def finish(self, status: str, report: Optional[str] = None, error: Optional[str] = None):
+        self.report = report
+        self.error = error
+        # Reports that were not generated live (e.g. served from the report cache) go out in chunks now
+        if report and not self.streamed_report_chars:
+            chunk_chars = get_config().SERVER_REPORT_CHUNK_CHARS
+            for start in range(0, len(report), chunk_chars):
+                self.publish("report", {"offset": start, "text": report[start:start + chunk_chars]})
+        if error:
+            self.publish("error", {"error": error})
+        self.publish("done", {"status": status})
+        self.status = status
+        for queue in self.subscribers:
+            queue.put_nowait(_FINISHED)
+
+    def open_subscription(self, after: int = 0) -> asyncio.Queue:
+        """Queue pre-filled with buffered frames after the given event id, then fed live frames."""
+        queue = asyncio.Queue()
+        for frame in self.frames[after:]:
+            queue.put_nowait(frame)
+        if self.finished:
+            queue.put_nowait(_FINISHED)
+        else:
+            self.subscribers.add(queue)
+        return queue
+
+    def close_subscription(self, queue: asyncio.Queue):
+        self.subscribers.discard(queue)
+
+
+class StreamingEventHandler(WorkflowEventHandler):
+    """Event handler that publishes workflow events to a RunStream."""
+
+    def __init__(self, stream: RunStream):
+        self.stream = stream
+        super().__init__(
+            on_phase_update=self.handle_phase_update,
+            on_tool_call=self.handle_tool_call,
+            on_clarification_needed=self.handle_clarification,
+            on_report_chunk=self.handle_report_chunk,
+        )
+
+    def handle_phase_update(self, event: PhaseEvent):
+        self.stream.publish_threadsafe("phase", dict(asdict(event), status=event.status.value))
+
+    def handle_tool_call(self, event: ToolCallEvent):
+        self.stream.publish_threadsafe("tool_call", asdict(event))
+
+    def handle_report_chunk(self, text: str):
+        self.stream.loop.call_soon_threadsafe(self.stream.publish_report_chunk, text)
+
+    def handle_clarification(self, questions: str) -> str:
+        self.stream.publish_threadsafe("clarification", {"questions": questions, "answer": HEADLESS_CLARIFICATION})
+        return HEADLESS_CLARIFICATION
+
+
+class ResearchService:
+    """Starts workflows on a thread pool and keeps the streams of recent runs."""
+
+    def __init__(self, max_concurrent_runs: Optional[int] = None, max_retained_runs: Optional[int] = None):
+        config = get_config()
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_concurrent_runs or config.SERVER_MAX_CONCURRENT_RUNS,
+            thread_name_prefix="research-run",
+        )
+        self.max_retained_runs = max_retained_runs or config.SERVER_MAX_RETAINED_RUNS
+        self.runs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def start(self, query: str, user_clarification: Optional[str] = None, priority: Optional[str] = None,
+              config: Optional[Config] = None) -> RunStream:
+        stream = RunStream(uuid.uuid4().hex, query, asyncio.get_running_loop())
+        with self._lock:
+            self.runs[stream.run_id] = stream
+            self._evict()
+        context = contextvars.copy_context()
+        self.executor.submit(context.run, self._run, stream, user_clarification, priority, config)
+        return stream
+
+    def _run(self, stream: RunStream, user_clarification: Optional[str], priority: Optional[str],
+             config: Optional[Config]):
+        from main import run_worklow
+        try:
+            report = run_worklow(
+                stream.query,
+                user_clarification=user_clarification,
+                event_handler=StreamingEventHandler(stream),
+                priority=priority,
+                config=config,
+            )
+            stream.loop.call_soon_threadsafe(stream.finish, "completed", report)
+        except Exception as e:
+            stream.loop.call_soon_threadsafe(stream.finish, "failed", None, str(e))
+
+    def _evict(self):
+        # Drop the oldest finished runs beyond the retention limit
+        for run_id in list(self.runs):
+            if len(self.runs) <= self.max_retained_runs:
+                break
+            if self.runs[run_id].finished:
+                del self.runs[run_id]
+
+    def get(self, run_id: str) -> Optional[RunStream]:
+        with self._lock:
+            return self.runs.get(run_id)
+
+
+service: Optional[ResearchService] = None
+
+
+async def _read_body(receive) -> bytes:
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            return body
+
+
+async def _send_json(send, status: int, data: dict):
+    body = json.dumps(data, default=str).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _stream_events(scope, receive, send, stream: RunStream):
+    headers = dict(scope.get("headers", []))
+    query = parse_qs(scope.get("query_string", b"").decode())
+    after = headers.get(b"last-event-id", b"").decode() or query.get("after", ["0"])[0]
+    after = int(after) if after.isdigit() else 0
+
+    await send({
+        "type": "http.response.start",
+        "status": 200,
+        "headers": [(b"content-type", b"text/event-stream"), (b"cache-control", b"no-cache")],
+    })
+
+    heartbeat = get_config().SERVER_HEARTBEAT_SECONDS
+    queue = stream.open_subscription(after)
+    disconnected = asyncio.ensure_future(_wait_for_disconnect(receive))
+    try:
+        while True:
+            next_frame = asyncio.ensure_future(queue.get())
+            done, _ = await asyncio.wait({next_frame, disconnected}, timeout=heartbeat,
+                                         return_when=asyncio.FIRST_COMPLETED)
+            if disconnected in done:
+                next_frame.cancel()
+                return
+            if next_frame not in done:
+                # Keep proxies from closing an idle connection
+                next_frame.cancel()
+                await send({"type": "http.response.body", "body": b": keep-alive\n\n", "more_body": True})
+                continue
+            frame = next_frame.result()
+            if frame is _FINISHED:
+                break
+            await send({"type": "http.response.body", "body": frame, "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+    finally:
+        disconnected.cancel()
+        stream.close_subscription(queue)
+
+
+async def _wait_for_disconnect(receive):
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+async def app(scope, receive, send):
+    """ASGI entry point."""
+    global service
+    if scope["type"] == "lifespan":
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                # Fail startup on missing API keys instead of on the first request
+                try:
+                    service = ResearchService()
+                except ConfigurationError as e:
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if service:
+                    service.executor.shutdown(wait=False, cancel_futures=True)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+    if scope["type"] != "http":
+        return
+
+    if service is None:
+        # ASGI servers without lifespan support
+        try:
+            service = ResearchService()
+        except ConfigurationError as e:
+            await _send_json(send, 500, {"error": str(e)})
+            return
+
+    method = scope["method"]
+    parts = [p for p in scope["path"].split("/") if p]
+
+    if method == "GET" and parts == ["metrics"]:
+        body = metrics.REGISTRY.render().encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"text/plain; version=0.0.4; charset=utf-8"),
+                        (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
+        return
+
+    if method == "POST" and parts == ["runs"]:
+        try:
+            request = json.loads(await _read_body(receive) or b"{}")
+        except json.JSONDecodeError:
+            await _send_json(send, 400, {"error": "Body must be JSON"})
+            return
+        query = str(request.get("query", "")).strip()
+        if not query:
+            await _send_json(send, 400, {"error": "'query' is required"})
+            return
+        priority = request.get("priority", DEFAULT_PRIORITY)
+        if priority not in parse_weights(get_config().SCHEDULER_WEIGHTS):
+            await _send_json(send, 400, {"error": f"Unknown priority class '{priority}'"})
+            return
+        overrides = request.get("config") or {}
+        if not isinstance(overrides, dict):
+            await _send_json(send, 400, {"error": "'config' must be an object"})
+            return
+        disallowed = sorted(set(overrides) - set(RUN_CONFIG_SETTINGS))
+        if disallowed:
+            await _send_json(send, 400, {"error": f"Settings not configurable per run: {', '.join(disallowed)}"})
+            return
+        try:
+            config = get_config().with_overrides(**overrides) if overrides else None
+        except ConfigurationError as e:
+            await _send_json(send, 400, {"error": str(e)})
+            return
+        stream = service.start(query, request.get("clarification"), priority, config)
+        await _send_json(send, 202, {"run_id": stream.run_id, "events": f"/runs/{stream.run_id}/events"})
+        return
+
+    if method == "GET" and len(parts) in (2, 3) and parts[0] == "runs":
+        stream = service.get(parts[1])
+        if stream is None:
+            await _send_json(send, 404, {"error": "Unknown run"})
+            return
+        if len(parts) == 2:
+            await _send_json(send, 200, {
+                "run_id": stream.run_id,
+                "query": stream.query,
+                "status": stream.status,
+                "report": stream.report,
+                "error": stream.error,
+            })
+            return
+        if parts[2] == "events":
+            await _stream_events(scope, receive, send, stream)
+            return
+
+    await _send_json(send, 404, {"error": "Not found"})
@@ -0,0 +1,161 @@
+"""Speculative research on the stated assumptions while the user answers clarifying questions."""
+import contextvars
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional
+
+from budget import RunBudget
+from config import get_config
+from report_cache import TfidfIndex, normalize_angle, normalize_understanding
+
+_active_speculation = contextvars.ContextVar("active_speculation", default=None)
+
+
+def active_speculation() -> Optional['SpeculativeResearch']:
+    """Return the speculation whose findings angles in this context may reuse, if any."""
+    return _active_speculation.get()
+
+
+def _similarity(a: str, b: str) -> float:
+    index = TfidfIndex()
+    index.add("a", a)
+    matches = index.most_similar(b, limit=1)
+    return matches[0][1] if matches else 0.0
+
+
+class SpeculativeResearch:
+    """
+    Plan and research on the Phase 1 assumptions while clarification is pending.
+
+    start() runs Phase 2 on the assumed understanding in the background and
+    begins the SPECULATIVE_MAX_ANGLES angles closest to the query itself
+    (those least dependent on assumptions), each on a small iteration budget.
+    Once the answers are in, adopt() reuses the speculative plan if the
+    updated understanding is essentially unchanged, or otherwise matches the
+    real plan's angles to the speculative ones by TF-IDF similarity and
+    cancels every speculative angle that matched nothing. Angles of the real
+    run then pick up matching results through claim(), except results cut
+    short by the small speculative iteration budget: those angles are
+    researched again under the run's normal limits (see rerunning()).
+    """
+
+    def __init__(self, query: str, understanding: dict, plan_fn: Callable[[dict], dict],
+                 investigate_fn: Callable[[dict, RunBudget], tuple]):
+        config = get_config()
+        self.query = query
+        self.understanding = understanding
+        self.plan_fn = plan_fn
+        self.investigate_fn = investigate_fn
+        self.max_angles = config.SPECULATIVE_MAX_ANGLES
+        self.max_iterations = config.SPECULATIVE_MAX_ITERATIONS
+        self.plan_similarity = config.SPECULATIVE_PLAN_SIMILARITY
+        self.angle_similarity = config.SPECULATIVE_ANGLE_SIMILARITY
+        self.plan: Future = Future()
+        self.reused_plan = False
+        self._angles = {}  # normalized angle text -> (angle, RunBudget, Future)
+        self._matches = {}  # normalized real angle text -> speculative key
+        self._rerun = set()  # normalized real angle texts whose speculative result hit the iteration cap
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(config.PHASE_3_CONCURRENCY, 1), thread_name_prefix="speculative"
+        )
+        self._token = None
+
+    def start(self) -> 'SpeculativeResearch':
+        # Speculative threads get the context from before activation, so they never claim from themselves
+        context = contextvars.copy_context()
+        self._executor.submit(context.run, self._plan_and_research, context)
+        self._token = _active_speculation.set(self)
+        return self
+
+    def _plan_and_research(self, context: contextvars.Context):
+        try:
+            plan = self.plan_fn(self.understanding)
+        except Exception as e:
+            self.plan.set_exception(e)
+            return
+
+        angles = {normalize_angle(d): d for d in plan.get("research_angles", [])}
+        index = TfidfIndex()
+        for key in angles:
+            index.add(key, key)
+        # Angles closest to the query itself depend least on the assumptions
+        anchor = " ".join([self.query, str(self.understanding.get("topic", "")),
+                           " ".join(map(str, self.understanding.get("aspects") or []))])
+        chosen = [key for key, _ in index.most_similar(anchor, limit=self.max_angles)]
+        with self._lock:
+            for key in chosen:
+                budget = RunBudget(max_iterations=self.max_iterations)
+                budget.add_angles(1)
+                future = self._executor.submit(context.copy().run, self.investigate_fn, angles[key], budget)
+                self._angles[key] = (angles[key], budget, future)
+        print(f"Speculatively researching {len(chosen)} of {len(angles)} planned angles")
+        # Publish the plan only once its angles are registered, so adopt() sees all of them
+        self.plan.set_result(plan)
+
+    def adopt(self, understanding: dict, replan: Callable[[], dict]) -> dict:
+        """Return the plan for the clarified understanding and cancel speculation it doesn't need."""
+        try:
+            plan = self.plan.result()
+        except Exception as e:
+            print(f"Speculative planning failed: {str(e)}")
+            plan = None
+
+        similarity = _similarity(normalize_understanding(self.understanding), normalize_understanding(understanding))
+        self.reused_plan = plan is not None and similarity >= self.plan_similarity
+        if not self.reused_plan:
+            plan = replan()
+
+        with self._lock:
+            available = TfidfIndex()
+            for key in self._angles:
+                available.add(key, key)
+            for d in plan.get("research_angles", []):
+                real_key = normalize_angle(d)
+                for key, score in available.most_similar(real_key, limit=1):
+                    if score >= self.angle_similarity:
+                        self._matches[real_key] = key
+                        available.remove(key)
+            matched = set(self._matches.values())
+            for key, (_, budget, _) in self._angles.items():
+                if key not in matched:
+                    budget.cancel()
+        print(f"Kept {len(matched)} of {len(self._angles)} speculative angles")
+        return plan
+
+    def claim(self, angle: dict) -> Optional[tuple]:
+        """Wait for and return the speculative (result JSON, fetched URLs) matching an angle, if any."""
+        real_key = normalize_angle(angle)
+        with self._lock:
+            key = self._matches.pop(real_key, None)
+            entry = self._angles.get(key)
+        if entry is None:
+            return None
+        speculative, budget, future = entry
+        try:
+            result = future.result()
+        except Exception as e:
+            print(f"Speculative research for '{speculative['angle']}' failed: {str(e)}")
+            return None
+        if result is not None and budget.unfinished_angles and budget.iterations_used >= self.max_iterations:
+            # Stopped by the speculative cap rather than MAX_TOOL_ITERATIONS; research it in full instead
+            print(f"Speculative research for '{speculative['angle']}' hit the {self.max_iterations}-iteration cap")
+            with self._lock:
+                self._rerun.add(real_key)
+            return None
+        return result
+
+    def rerunning(self, angle: dict) -> bool:
+        """Whether the angle's speculative result was dropped for hitting the speculative iteration cap."""
+        with self._lock:
+            return normalize_angle(angle) in self._rerun
+
+    def close(self):
+        """Cancel all speculative work that was not claimed and deactivate."""
+        with self._lock:
+            for _, budget, _ in self._angles.values():
+                budget.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        if self._token is not None:
+            _active_speculation.reset(self._token)
+            self._token = None
@@ -6,6 +6,7 @@ from pathlib import Path
 from main import run_worklow
 from config import get_config, ConfigurationError
 from events import WorkflowEventHandler, PhaseEvent, ToolCallEvent, PhaseStatus
+from metrics import start_metrics_server
 
 # Page configuration
 st.set_page_config(
@@ -171,6 +172,8 @@ def main():
             st.success("✅ API keys configured")
             st.info(f"Model: {config.GEMINI_MODEL}")
             st.info(f"Max iterations: {config.MAX_TOOL_ITERATIONS}")
+            # Started once per process; reruns of the script reuse it
+            start_metrics_server()
         except ConfigurationError as e:
             st.error("❌ Configuration error")
             st.error(str(e))
@@ -1,9 +1,19 @@
 import requests
-from bs4 import BeautifulSoup
-import fitz
-import xml.etree.ElementTree as ET
-from typing import Optional
+from typing import Optional, Tuple
+import contextvars
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from config import get_config
+from documents import active_documents, extract_result_urls
+from local_index import get_local_index
+from arxiv_store import get_arxiv_store, parse_arxiv_id
+from fetch_strategy import FetchStrategyEngine
+from circuit_breaker import get_circuit_breaker
+import metrics
+
+ARXIV_API_URL = "http://export.arxiv.org/api/query"
 
 def web_search(query: str, limit:int = 5, start_date: str = "", end_date:str = "") -> str:
     """
@@ -19,34 +29,64 @@ def web_search(query: str, limit:int = 5, start_date: str = "", end_date:str = "
         Formatted string containing search results with title, URL, and content
     """
     try:
-        config = get_config()
-        headers = {
-            "Authorization" : f"Bearer {config.TAVILY_API_KEY}",
-            "Content-Type": "application/json"
-        }
-
-        response = requests.post(
-            url = "https://api.tavily.com/search",
-            headers = headers,
-            json={
-                "query": query,
-                "max_results": limit,
-                "start_date": start_date,
-                "end_date": end_date
-            },
-            
-        )
-        data = response.json()
+        results = _tavily_search(query, limit, start_date, end_date)
         
         output = ""
-        for r in data.get("results", []):
+        for r in results:
             output += f"Title: {r.get('title', '')}\n"
             output += f"URL: {r.get('url', '')}\n"
             output += f"Content: {r.get('content', '')}\n\n"
+        _prefetch_results(output)
         return output if output else "No results found. Try modifying the query."
     except Exception as e:
         return f"Error performing web search: {str(e)}"
 
+def _tavily_search(query: str, limit: int = 5, start_date: str = "", end_date: str = "") -> list:
+    """Run one Tavily search and return its raw result records."""
+    config = get_config()
+    headers = {
+        "Authorization" : f"Bearer {config.TAVILY_API_KEY}",
+        "Content-Type": "application/json"
+    }
+    body = {
+        "query": query,
+        "max_results": limit,
+        "start_date": start_date,
+        "end_date": end_date
+    }
+    # Page text only pays off when a run-scoped document cache can serve it to fetch_url
+    documents = active_documents()
+    if documents and config.SEARCH_RAW_CONTENT != "off":
+        body["include_raw_content"] = config.SEARCH_RAW_CONTENT
+
+    response = requests.post(
+        url = "https://api.tavily.com/search",
+        headers = headers,
+        json=body,
+        
+    )
+    results = response.json().get("results", [])
+    if "include_raw_content" in body:
+        _store_inline_content(documents, results)
+    return results
+
+def _store_inline_content(documents, results: list):
+    """Keep page text returned with search results so a later fetch_url on the URL needs no download."""
+    index = get_local_index()
+    for r in results:
+        url = r.get("url", "")
+        content = r.get("raw_content") or ""
+        # arXiv fetches go through the section store and return the full paper, not the abstract page
+        if not url or "arxiv" in url or not _is_content_sufficient(content):
+            continue
+        stored = documents.offer(url, content)
+        metrics.record_cache_lookup("search_inline_content", stored)
+        if stored and index:
+            try:
+                index.add(url, content)
+            except Exception as e:
+                print(f"Failed to index {url}: {str(e)}")
+
 def arxiv_search(query: str, max_results: int = 5) -> str:
     """
     Search academic papers on arXiv.
@@ -58,8 +98,19 @@ def arxiv_search(query: str, max_results: int = 5) -> str:
     Returns:
         Formatted string containing paper details (title, authors, published date, URL, abstract)
     """
+    papers = _arxiv_search_papers(query, max_results)
+
+    output = ""
+    for paper in papers:
+        output += _format_arxiv_paper(paper, abstract_chars=500)
+
+    _prefetch_results(output)
+    return output if output else "No results found. Try modifying the query."
+
+def _arxiv_search_papers(query: str, max_results: int = 5) -> list:
+    """Run one arXiv relevance search and store the returned paper metadata."""
     response = requests.get(
-        "http://export.arxiv.org/api/query",
+        ARXIV_API_URL,
         params={
             "search_query": f"all:{query}",
             "start": 0,
@@ -68,64 +119,357 @@ def arxiv_search(query: str, max_results: int = 5) -> str:
             "sortOrder": "descending"
         }
     )
-    
-    # Parse XML response
-    root = ET.fromstring(response.content)
-    namespace = {"atom": "http://www.w3.org/2005/Atom"}
-    
+    papers = _parse_arxiv_feed(response.content)
+    _store_arxiv_metadata(papers)
+    return papers
+
+def multi_search(queries: list, sources: Optional[list] = None, limit: int = 10) -> str:
+    """
+    Run several search queries at once across the web and arXiv and merge the results.
+
+    Every (query, source) pair is searched concurrently. Results are
+    deduplicated by URL (arXiv versions collapse to one paper) and ranked by
+    reciprocal rank fusion, so documents that rank well for several phrasings
+    come first.
+
+    Args:
+        queries: Search query strings, e.g. alternative phrasings of one question
+        sources: Backends to search, any of "web" and "arxiv" (default: both)
+        limit: Maximum number of merged results to return (default: 10)
+
+    Returns:
+        Formatted string containing merged results with title, URL, matching queries and a short snippet
+    """
+    config = get_config()
+    queries = list(dict.fromkeys(str(q).strip() for q in queries if str(q).strip()))[:config.MULTI_SEARCH_MAX_QUERIES]
+    sources = [s for s in (sources or ["web", "arxiv"]) if s in ("web", "arxiv")] or ["web", "arxiv"]
+    if not queries:
+        return "Error performing multi search: no queries given"
+    # Function-call arguments arrive as JSON numbers, e.g. 5.0
+    try:
+        limit = min(max(int(limit), 1), 50)
+    except (TypeError, ValueError):
+        limit = 10
+
+    per_query = config.MULTI_SEARCH_RESULTS_PER_QUERY
+    searches = [(query, source) for query in queries for source in sources]
+    with ThreadPoolExecutor(max_workers=min(config.MULTI_SEARCH_WORKERS, len(searches))) as executor:
+        futures = [
+            executor.submit(contextvars.copy_context().run, _search_records, query, source, per_query)
+            for query, source in searches
+        ]
+        ranked_lists = []
+        errors = []
+        for (query, source), future in zip(searches, futures):
+            try:
+                ranked_lists.append((query, future.result()))
+            except Exception as e:
+                errors.append(f"{source} search for '{query}' failed: {str(e)}")
+
+    merged = {}  # dedup key -> record with fused score and matching queries
+    for query, records in ranked_lists:
+        for rank, record in enumerate(records, start=1):
+            entry = merged.setdefault(record["key"], dict(record, score=0.0, queries=[]))
+            entry["score"] += 1.0 / (config.MULTI_SEARCH_RRF_K + rank)
+            if query not in entry["queries"]:
+                entry["queries"].append(query)
+            # Keep the longest snippet seen for the document
+            if len(record["snippet"]) > len(entry["snippet"]):
+                entry["snippet"] = record["snippet"]
+
+    results = sorted(merged.values(), key=lambda r: r["score"], reverse=True)[:limit]
+    output = ""
+    for r in results:
+        output += f"Title: {r['title']}\n"
+        output += f"URL: {r['url']}\n"
+        output += f"Matched: {'; '.join(r['queries'])}\n"
+        output += f"Content: {r['snippet']}\n\n"
+    if errors:
+        output += "\n".join(errors) + "\n"
+    if not results:
+        return output + "No results found. Try modifying the queries."
+    _prefetch_results(output)
+    return output
+
+def _search_records(query: str, source: str, limit: int) -> list:
+    """One search as uniform records (key, title, url, snippet), in rank order."""
+    snippet_chars = get_config().MULTI_SEARCH_SNIPPET_CHARS
+    records = []
+    if source == "arxiv":
+        for paper in _arxiv_search_papers(query, limit):
+            summary = paper["summary"]
+            records.append({
+                "key": f"arxiv:{paper['arxiv_id']}",
+                "title": paper["title"],
+                "url": paper["url"],
+                "snippet": summary[:snippet_chars] + ("..." if len(summary) > snippet_chars else ""),
+            })
+        return records
+
+    for r in _tavily_search(query, limit):
+        url = r.get("url", "")
+        if not url:
+            continue
+        content = r.get("content", "")
+        records.append({
+            "key": _dedup_key(url),
+            "title": r.get("title", ""),
+            "url": url,
+            "snippet": content[:snippet_chars] + ("..." if len(content) > snippet_chars else ""),
+        })
+    return records
+
+def _dedup_key(url: str) -> str:
+    """Key that treats trivially different URLs of one document (scheme, www, fragment, trailing slash) as equal."""
+    parsed = parse_arxiv_id(url) if "arxiv" in url else None
+    if parsed:
+        return f"arxiv:{parsed[0]}"
+    key = re.sub(r"^https?://(www\.)?", "", url.split("#", 1)[0].strip())
+    return key.rstrip("/").lower()
+
+def arxiv_papers(ids: list) -> str:
+    """
+    Get metadata and full abstracts for many arXiv papers in one request.
+
+    Papers already in the local arXiv store are served from it; the rest are
+    fetched with a single id_list API call per batch.
+
+    Args:
+        ids: arXiv IDs or URLs (e.g. "2404.04365", "2404.04365v2", "http://arxiv.org/abs/2404.04365")
+
+    Returns:
+        Formatted string containing paper details (title, authors, published date, URL, abstract)
+    """
+    parsed = [parse_arxiv_id(str(i)) for i in ids]
+    invalid = [str(i) for i, p in zip(ids, parsed) if p is None]
+    wanted = list(dict.fromkeys(p for p in parsed if p))
+
+    store = get_arxiv_store()
+    found = {}
+    missing = []
+    for arxiv_id, version in wanted:
+        paper = store.get_metadata(arxiv_id, version)
+        if paper:
+            found[(arxiv_id, version)] = paper
+        else:
+            missing.append((arxiv_id, version))
+
+    batch_size = get_config().ARXIV_ID_BATCH_SIZE
+    for start in range(0, len(missing), batch_size):
+        batch = missing[start:start + batch_size]
+        try:
+            response = requests.get(
+                ARXIV_API_URL,
+                params={
+                    "id_list": ",".join(arxiv_id + version for arxiv_id, version in batch),
+                    "max_results": len(batch),
+                },
+                timeout=30,
+            )
+            papers = _parse_arxiv_feed(response.content)
+        except Exception as e:
+            return f"Error fetching arXiv metadata: {str(e)}"
+        _store_arxiv_metadata(papers)
+        for paper in papers:
+            found[(paper["arxiv_id"], paper["version"])] = paper
+            found.setdefault((paper["arxiv_id"], ""), paper)
+
     output = ""
+    for key in wanted:
+        if key in found:
+            output += _format_arxiv_paper(found[key])
+        else:
+            invalid.append(key[0] + key[1])
+    if invalid:
+        output += f"Not found on arXiv: {', '.join(invalid)}\n"
+    return output if output else "No results found. Check the arXiv IDs."
+
+def _parse_arxiv_feed(content: bytes) -> list:
+    """Parse an arXiv Atom feed into paper records."""
+    import xml.etree.ElementTree as ET
+
+    root = ET.fromstring(content)
+    namespace = {"atom": "http://www.w3.org/2005/Atom"}
+
+    papers = []
     for entry in root.findall("atom:entry", namespace):
-        title = entry.find("atom:title", namespace).text.strip()
-        summary = entry.find("atom:summary", namespace).text.strip()
-        published = entry.find("atom:published", namespace).text[:10]
-        
-        # Get authors
-        authors = [a.find("atom:name", namespace).text 
-                   for a in entry.findall("atom:author", namespace)]
-        authors_str = ", ".join(authors[:3])
-        if len(authors) > 3:
-            authors_str += " et al."
-        
-        # Get URL
         url = entry.find("atom:id", namespace).text
-        
-        output += f"Title: {title}\n"
-        output += f"Authors: {authors_str}\n"
-        output += f"Published: {published}\n"
-        output += f"URL: {url}\n"
-        output += f"Abstract: {summary[:500]}...\n\n"
-    
-    return output if output else "No results found. Try modifying the query."
+        parsed = parse_arxiv_id(url)
+        # Unknown IDs come back as an entry titled "Error" pointing at the API
+        if parsed is None or "/api/" in url:
+            continue
+        papers.append({
+            "arxiv_id": parsed[0],
+            "version": parsed[1],
+            "title": " ".join(entry.find("atom:title", namespace).text.split()),
+            "authors": [a.find("atom:name", namespace).text
+                        for a in entry.findall("atom:author", namespace)],
+            "published": entry.find("atom:published", namespace).text[:10],
+            "summary": " ".join(entry.find("atom:summary", namespace).text.split()),
+            "url": url,
+        })
+    return papers
+
+def _store_arxiv_metadata(papers: list):
+    try:
+        store = get_arxiv_store()
+        for paper in papers:
+            store.put_metadata(paper)
+    except Exception as e:
+        print(f"Failed to store arXiv metadata: {str(e)}")
+
+def _format_arxiv_paper(paper: dict, abstract_chars: Optional[int] = None) -> str:
+    authors_str = ", ".join(paper["authors"][:3])
+    if len(paper["authors"]) > 3:
+        authors_str += " et al."
+    summary = paper["summary"]
+    if abstract_chars:
+        summary = summary[:abstract_chars] + "..."
+
+    output = f"Title: {paper['title']}\n"
+    output += f"Authors: {authors_str}\n"
+    output += f"Published: {paper['published']}\n"
+    output += f"URL: {paper['url']}\n"
+    output += f"Abstract: {summary}\n\n"
+    return output
+
+def _prefetch_results(search_output: str):
+    """Speculatively fetch the top result URLs while the model decides what to read."""
+    documents = active_documents()
+    if documents:
+        documents.prefetch(extract_result_urls(search_output), _fetch_and_index)
+
+def local_search(query: str, limit: int = 5) -> str:
+    """
+    Search documents fetched during earlier research runs.
 
-def fetch_url(url: str) -> str:
+    Args:
+        query: Search query string
+        limit: Maximum number of documents to return (default: 5)
+
+    Returns:
+        Formatted string containing matching documents with title, URL, fetch date and snippet
+    """
+    index = get_local_index()
+    if not index:
+        return "No results found. The local document index is disabled."
+    # Function-call arguments arrive as JSON numbers, e.g. 5.0
+    try:
+        limit = min(max(int(limit), 1), 50)
+    except (TypeError, ValueError):
+        limit = 5
+    try:
+        results = index.search(query, limit=limit)
+    except Exception as e:
+        return f"Error searching local index: {str(e)}"
+
+    output = ""
+    for r in results:
+        output += f"Title: {r['title']}\n"
+        output += f"URL: {r['url']}\n"
+        output += f"Fetched: {time.strftime('%Y-%m-%d', time.localtime(r['fetched_at']))}\n"
+        output += f"Content: {r['snippet']}\n\n"
+    return output if output else "No results found. Try modifying the query or use web_search."
+
+def fetch_url(url: str, section: Optional[str] = None) -> str:
     """
     Fetch and extract content from a URL. Automatically handles different URL types.
     
     Args:
         url: The URL to fetch content from
+        section: For arXiv papers only, "outline" for the abstract and section list,
+            or a section heading (e.g. "Introduction") to return just that section
     
     Returns:
         Extracted text content from the URL
     """
-    
+    if section and "arxiv" in url:
+        return fetch_arxiv_paper(arxiv_url = url, section = section)
+
+    # Serve documents already fetched or prefetched during this run
+    documents = active_documents()
+    if documents:
+        content = documents.get(url)
+        metrics.record_cache_lookup("documents", content is not None)
+        if content is not None:
+            return content
+
+    content = _fetch_and_index(url)
+    if documents and not content.startswith("Error"):
+        documents.put(url, content)
+    return content
+
+def _fetch_and_index(url: str) -> str:
+    """Fetch a URL, preferring a recent copy from the local index, and index new content."""
+    index = get_local_index()
+    if index:
+        max_age = get_config().LOCAL_INDEX_MAX_AGE_DAYS * 86400
+        content = index.get(url, max_age_seconds=max_age)
+        metrics.record_cache_lookup("local_index", bool(content))
+        if content:
+            return content
+
+    # Don't spend time on hosts that keep failing; the model gets told to look elsewhere
+    breaker = get_circuit_breaker()
+    if breaker:
+        short_circuit = breaker.check(url)
+        metrics.record_cache_lookup("circuit_breaker", bool(short_circuit))
+        if short_circuit:
+            return short_circuit
+
+    content, host_error = _fetch_url_uncached(url)
+    usable = _is_usable_content(content)
+    if breaker:
+        # Only connection failures, timeouts, 429 and 5xx from the site itself count against it;
+        # 404s, size limits and Jina outages say nothing about the host's health
+        if host_error:
+            breaker.record_failure(url, host_error.splitlines()[0])
+        else:
+            breaker.record_success(url)
+    if index and usable:
+        try:
+            index.add(url, content)
+        except Exception as e:
+            print(f"Failed to index {url}: {str(e)}")
+    return content
+
+def _fetch_url_uncached(url: str) -> Tuple[str, Optional[str]]:
+    """Fetch a URL; returns (content, error to count against the URL's host or None)."""
     # for arXiv url
     if "arxiv" in url:
-        return fetch_arxiv_paper(arxiv_url = url)
+        content = fetch_arxiv_paper(arxiv_url = url)
+        return content, _host_error(content)
         
     # Check if PDF
     if url.endswith(".pdf"):
-        return fetch_pdf(url)
+        content = fetch_pdf(url)
+        return content, _host_error(content)
     
     # Regular webpage
-    # For JavaScript-rendered dynamic content, this function may return incomplete 
-    # or empty content. If the returned content appears incomplete or mentions JavaScript 
-    # requirement, use fetch_url_with_jina() instead.
+    # For JavaScript-rendered dynamic content, fetch_webpage may return incomplete
+    # or empty content, so the engine hedges with Jina and learns which domains need it.
+    content, results = _webpage_fetch_engine().fetch_results(url)
+    if _is_usable_content(content):
+        return content, None
+    # The model sees the last-resort (Jina) output, but the host is judged by the direct fetch
+    return content, next(filter(None, map(_host_error, results.values())), None)
 
-    content =  fetch_webpage(url)
-    if _is_content_sufficient(content):
-        return content
-        
-    return fetch_url_using_jina(url)
+_fetch_engine = None
+_fetch_engine_lock = threading.Lock()
+
+def _webpage_fetch_engine() -> FetchStrategyEngine:
+    global _fetch_engine
+    with _fetch_engine_lock:
+        if _fetch_engine is None:
+            _fetch_engine = FetchStrategyEngine(
+                {"direct": fetch_webpage, "jina": fetch_url_using_jina},
+                is_sufficient=_is_usable_content,
+            )
+        return _fetch_engine
+
+def _is_usable_content(content: Optional[str]) -> bool:
+    """Sufficient extracted text that is not an error message (HTTP error pages can be long)."""
+    return _is_content_sufficient(content) and not content.startswith("Error")
 
 def _is_content_sufficient(content: Optional[str]) -> bool:
     """
@@ -154,47 +498,139 @@ def _is_content_sufficient(content: Optional[str]) -> bool:
     
     return True
 
+class FetchError(str):
+    """Error message returned by a fetcher; host_fault marks failures the target host is to blame for."""
+
+    def __new__(cls, message: str, host_fault: bool = False):
+        error = super().__new__(cls, message)
+        error.host_fault = host_fault
+        return error
+
+def _is_host_fault(error: Exception) -> bool:
+    """Connection failures, timeouts, 429 and 5xx count against a host; 4xx and size limits don't."""
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        status = error.response.status_code
+        return status == 429 or status >= 500
+    return False
+
+def _host_error(content: str) -> Optional[str]:
+    """Return the content if it is an error the fetched host is to blame for."""
+    return content if getattr(content, "host_fault", False) else None
+
+class _Download:
+    """Body of a size-limited streamed download."""
+    __slots__ = ("body", "is_pdf", "encoding", "truncated", "limit")
+
+    def __init__(self, body: bytes, is_pdf: bool, encoding: Optional[str], truncated: bool, limit: int):
+        self.body = body
+        self.is_pdf = is_pdf
+        self.encoding = encoding
+        self.truncated = truncated
+        self.limit = limit
+
+    def truncation_note(self) -> str:
+        if not self.truncated:
+            return ""
+        return f"\n\n[Truncated: only the first {self.limit // 1_000_000 or 1} MB of this document was downloaded]"
+
+class DownloadTooLarge(Exception):
+    """Raised when a PDF is larger than the configured limit (a partial PDF can't be parsed)."""
+    pass
+
+def _download(url: str, timeout: float, expect_pdf: bool = False, headers: Optional[dict] = None) -> _Download:
+    """
+    Stream a response body, capped at MAX_PDF_BYTES or MAX_HTML_BYTES.
+
+    The content type (from the header, or sniffed from the first bytes) picks
+    the limit before the rest of the body is read. HTML over the limit is cut
+    off and marked truncated; PDFs over the limit are rejected, using the
+    declared Content-Length to abort before downloading when possible.
+    """
+    config = get_config()
+    with requests.get(url, timeout=timeout, stream=True, headers=headers) as response:
+        response.raise_for_status()
+        content_type = response.headers.get("Content-Type", "").lower()
+        declared = int(response.headers.get("Content-Length") or 0)
+        chunks = response.iter_content(chunk_size=65536)
+        body = next(chunks, b"")
+
+        # Trust the bytes over the URL: "PDF" links often serve HTML landing pages and vice versa
+        is_pdf = body.startswith(b"%PDF") or "application/pdf" in content_type or (
+            expect_pdf and not body.lstrip().startswith(b"<"))
+        limit = config.MAX_PDF_BYTES if is_pdf else config.MAX_HTML_BYTES
+        if is_pdf and declared > limit:
+            raise DownloadTooLarge(f"document is {declared / 1_000_000:.1f} MB, over the {limit / 1_000_000:.0f} MB limit")
+
+        buffer = bytearray(body)
+        truncated = False
+        for chunk in chunks:
+            buffer += chunk
+            if len(buffer) > limit:
+                truncated = True
+                break
+        if truncated:
+            if is_pdf:
+                raise DownloadTooLarge(f"document exceeds the {limit / 1_000_000:.0f} MB limit")
+            del buffer[limit:]
+
+    return _Download(bytes(buffer), is_pdf, response.encoding, truncated, limit)
+
+def _extract_html_text(html) -> str:
+    """Extract readable text from HTML (str or bytes; bytes let BeautifulSoup detect the charset)."""
+    # Imported on first use to keep CLI and worker startup fast
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+
+    # Remove scripts, styles, nav, footer
+    for tag in soup(["script", "style", "nav", "footer", "header"]):
+        tag.decompose()
+
+    # Get text
+    text = soup.get_text(separator="\n", strip=True)
+
+    # Clean up whitespace
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    return "\n".join(lines)
+
+def _extract_pdf_text(data: bytes) -> str:
+    # PyMuPDF is heavy to import, load it only when a PDF is actually fetched
+    import fitz
+
+    # Load PDF from bytes
+    doc = fitz.open(stream=data, filetype="pdf")
+
+    text = ""
+    for page in doc:
+        text += page.get_text()
+
+    doc.close()
+    return text
+
+def _extract_download(download: _Download) -> str:
+    """Route the body to the extractor matching its actual content type."""
+    if download.is_pdf:
+        return _extract_pdf_text(download.body) + download.truncation_note()
+    return _extract_html_text(download.body) + download.truncation_note()
+
 def fetch_webpage(url: str) -> str:
     """Fetch and extract text from HTML page"""
     try:
-        response = requests.get(url, timeout=10)
-        soup = BeautifulSoup(response.text, "html.parser")
-        
-        # Remove scripts, styles, nav, footer
-        for tag in soup(["script", "style", "nav", "footer", "header"]):
-            tag.decompose()
-        
-        # Get text
-        text = soup.get_text(separator="\n", strip=True)
-        
-        # Clean up whitespace
-        lines = [line.strip() for line in text.splitlines() if line.strip()]
-        text = "\n".join(lines)
-        
-        return text
-
+        return _extract_download(_download(url, timeout=10))
     except Exception as e:
-        return f"Error fetching webpage: {str(e)}"
+        return FetchError(f"Error fetching webpage: {str(e)}", _is_host_fault(e))
 
 def fetch_pdf(url: str) -> str:
     """Fetch and extract text from PDF"""
     try:
-        response = requests.get(url, timeout=30)
-        
-        # Load PDF from bytes
-        doc = fitz.open(stream=response.content, filetype="pdf")
-        
-        text = ""
-        for page in doc:
-            text += page.get_text()
-        
-        doc.close()
-        return text
+        return _extract_download(_download(url, timeout=30, expect_pdf=True))
     except Exception as e:
-        return f"Error fetching PDF: {str(e)}"
+        return FetchError(f"Error fetching PDF: {str(e)}", _is_host_fault(e))
 
-def fetch_arxiv_paper(arxiv_url: str) -> str:
-    """Fetch full arXiv paper content"""
+def fetch_arxiv_paper(arxiv_url: str, section: Optional[str] = None) -> str:
+    """Fetch full arXiv paper content, its outline, or a single section"""
     
     # Convert any arXiv URL to PDF URL
     # http://arxiv.org/abs/2404.04365 -> http://arxiv.org/pdf/2404.04365.pdf
@@ -206,8 +642,56 @@ def fetch_arxiv_paper(arxiv_url: str) -> str:
         pdf_url = arxiv_url if arxiv_url.endswith(".pdf") else arxiv_url + ".pdf"
     else:
         return "Invalid arXiv URL"
-    
-    return fetch_pdf(pdf_url)
+
+    parsed = parse_arxiv_id(arxiv_url)
+    if parsed is None:
+        return fetch_pdf(pdf_url)
+
+    # Full text is split into sections once and kept in the arXiv store
+    store = get_arxiv_store()
+    sections = store.get_sections(*parsed)
+    if sections is None:
+        text = fetch_pdf(pdf_url)
+        if text.startswith("Error"):
+            return text
+        sections = _split_sections(text)
+        try:
+            store.put_sections(*parsed, sections)
+        except Exception as e:
+            print(f"Failed to store arXiv sections: {str(e)}")
+
+    if not section:
+        return "\n".join(body for _, body in sections)
+
+    if section.strip().lower() == "outline":
+        paper = store.get_metadata(*parsed)
+        output = f"Title: {paper['title']}\nAbstract: {paper['summary']}\n\n" if paper else ""
+        output += "Sections:\n"
+        output += "\n".join(f"- {heading} ({len(body)} chars)" for heading, body in sections)
+        return output
+
+    wanted = section.strip().lower()
+    matching = [body for heading, body in sections if wanted in heading.lower()]
+    if not matching:
+        headings = ", ".join(heading for heading, _ in sections)
+        return f"Section '{section}' not found. Available sections: {headings}"
+    return "\n".join(matching)
+
+# "1 Introduction", "3. Method", "IV. RESULTS", or well-known unnumbered headings
+_SECTION_HEADING_RE = re.compile(
+    r"^(?:(?:\d{1,2}|[IVX]{1,4})\.?\s+[A-Z][^\n]{1,80}"
+    r"|Abstract|Introduction|Related Work|Background|Conclusions?|References|Bibliography"
+    r"|Acknowledge?ments?|Appendix[^\n]{0,60})(?<![.,;:])$"
+)
+
+def _split_sections(text: str) -> list:
+    """Split extracted paper text into [[heading, text], ...] at top-level headings."""
+    sections = [["Front matter", []]]
+    for line in text.splitlines():
+        if _SECTION_HEADING_RE.match(line.strip()):
+            sections.append([line.strip(), []])
+        sections[-1][1].append(line)
+    return [[heading, "\n".join(lines)] for heading, lines in sections if any(l.strip() for l in lines)]
 
 
 def fetch_url_using_jina(url: str) -> str:
@@ -230,10 +714,13 @@ def fetch_url_using_jina(url: str) -> str:
         Fully rendered page content in markdown format
     """
     try:
-        response = requests.get(
+        download = _download(
             f"https://r.jina.ai/{url}",
+            timeout=get_config().JINA_TIMEOUT_SECONDS,
             headers={"Accept": "text/markdown"},
         )
-        return response.text if response.text else "No content extracted."
+        text = download.body.decode(download.encoding or "utf-8", errors="replace")
+        return text + download.truncation_note() if text else "No content extracted."
     except Exception as e:
-        return f"Error fetching URL with Jina: {str(e)}"
+        # Failures of the proxy itself are not the target host's fault
+        return FetchError(f"Error fetching URL with Jina: {str(e)}")
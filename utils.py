@@ -1,47 +1,190 @@
 import requests
-from tools import web_search, arxiv_search, fetch_url
-from function_declarations import web_search_dec, fetch_url_dec, arxiv_search_dec
+from tools import web_search, arxiv_search, arxiv_papers, multi_search, fetch_url, local_search
+from function_declarations import web_search_dec, fetch_url_dec, arxiv_search_dec, arxiv_papers_dec, multi_search_dec, local_search_dec
 from config import get_config
+from context_cache import ContextCache
+from llm_cache import get_recorder, payload_key, LLMCacheMiss
+from batch import active_batch
+from conversation import Conversation, encode_request
+from scheduler import scheduled
+import metrics
 import os
 import json
+import time
 
 available_functions = {
   'web_search': web_search,
   'arxiv_search': arxiv_search,
+  'arxiv_papers': arxiv_papers,
+  'multi_search': multi_search,
   'fetch_url' : fetch_url,
+  'local_search': local_search,
 }
 
-def generate_response(messages, model=None, thinking_level=None, tools = []):
+def generate_response(messages, model=None, thinking_level=None, tools = [], context_cache=None):
     try:
       config = get_config()
       model = model or config.GEMINI_MODEL
       thinking_level = thinking_level or config.THINKING_LEVEL
-      url = f"https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent?key={config.GEMINI_API_KEY}"
+      url = f"{config.GEMINI_API_BASE}/models/{model}:generateContent?key={config.GEMINI_API_KEY}"
       headers = {
           "Content-Type": "application/json",
       }
 
-      payload = {
-          "contents": messages,
-          "generationConfig": {
-              "thinkingConfig": {
-                  "thinkingLevel": thinking_level
-              },
-          }
-      }
+      payload = _build_payload(messages, thinking_level, tools)
 
-      if tools:
-        payload["tools"] = [
-              {"functionDeclarations": tools}
-          ]
+      # Serve from the record/replay store; the key covers the full logical request
+      recorder = get_recorder()
+      if recorder:
+        key = payload_key(model, payload)
+        if recorder.replays:
+          recorded = recorder.lookup(key)
+          metrics.record_cache_lookup("llm_replay", recorded is not None)
+          if recorded is not None:
+            return recorded
+          if recorder.mode == "replay":
+            raise LLMCacheMiss(f"No recorded response for request {key[:12]}")
 
-      response = requests.post(url = url, headers = headers, json = payload)
-      response.raise_for_status()
-      return response.json()
-    
+      phase = metrics.current_phase()
+      started = time.monotonic()
+      batch = active_batch()
+      try:
+        if batch:
+          # Offline bulk mode: this workflow waits until its batch job completes; the collector
+          # takes scheduler slots for the job's own HTTP calls
+          response_json = batch.submit(model, payload).result()
+        else:
+          # Share upstream capacity by priority class; queue wait is reported by the scheduler
+          with scheduled("llm"):
+            started = time.monotonic()
+            response_json = _post_generate_content(url, headers, payload, context_cache)
+      except Exception:
+        metrics.LLM_ERRORS.inc(phase=phase)
+        raise
+      metrics.LLM_REQUEST_SECONDS.observe(time.monotonic() - started, phase=phase)
+      _record_token_usage(phase, response_json)
+
+      if recorder and recorder.records:
+        recorder.store(key, model, response_json)
+      return response_json
+
+    except LLMCacheMiss:
+      raise
     except Exception as e:
       raise Exception(f"Failed to generate response: {str(e)}")
 
+def _build_payload(messages, thinking_level, tools=None):
+    payload = {
+        "contents": messages,
+        "generationConfig": {
+            "thinkingConfig": {
+                "thinkingLevel": thinking_level
+            },
+        }
+    }
+
+    if tools:
+        payload["tools"] = [
+            {"functionDeclarations": tools}
+        ]
+    return payload
+
+def generate_response_stream(messages, model=None, thinking_level=None):
+    """
+    Yield the response text in chunks as Gemini generates it (streamGenerateContent over SSE).
+
+    Uses the same record/replay key as generate_response for an identical
+    request, so recorded runs replay whether or not they were streamed.
+    """
+    if active_batch():
+        # Batch jobs return whole responses; hand the text over in one piece
+        yield extract_content(generate_response(messages, model=model, thinking_level=thinking_level))
+        return
+
+    config = get_config()
+    model = model or config.GEMINI_MODEL
+    thinking_level = thinking_level or config.THINKING_LEVEL
+    payload = _build_payload(messages, thinking_level)
+
+    recorder = get_recorder()
+    if recorder:
+        key = payload_key(model, payload)
+        if recorder.replays:
+            recorded = recorder.lookup(key)
+            metrics.record_cache_lookup("llm_replay", recorded is not None)
+            if recorded is not None:
+                yield extract_content(recorded)
+                return
+            if recorder.mode == "replay":
+                raise LLMCacheMiss(f"No recorded response for request {key[:12]}")
+
+    url = f"{config.GEMINI_API_BASE}/models/{model}:streamGenerateContent?alt=sse&key={config.GEMINI_API_KEY}"
+    phase = metrics.current_phase()
+    texts = []
+    usage = {}
+    try:
+        # Share upstream capacity by priority class; queue wait is reported by the scheduler
+        with scheduled("llm"):
+            started = time.monotonic()
+            with requests.post(url=url, headers={"Content-Type": "application/json"}, json=payload, stream=True) as response:
+                response.raise_for_status()
+                for line in response.iter_lines():
+                    # Each SSE data line is a partial GenerateContentResponse
+                    if not line.startswith(b"data:"):
+                        continue
+                    chunk = json.loads(line[5:])
+                    usage = chunk.get("usageMetadata", usage)
+                    for part in chunk.get("candidates", [{}])[0].get("content", {}).get("parts", []):
+                        if "text" in part and not part.get("thought"):
+                            texts.append(part["text"])
+                            yield part["text"]
+    except Exception as e:
+        metrics.LLM_ERRORS.inc(phase=phase)
+        raise Exception(f"Failed to generate response: {str(e)}")
+    metrics.LLM_REQUEST_SECONDS.observe(time.monotonic() - started, phase=phase)
+
+    assembled = {
+        "candidates": [{"content": {"role": "model", "parts": [{"text": "".join(texts)}]}}],
+        "usageMetadata": usage,
+    }
+    _record_token_usage(phase, assembled)
+    if recorder and recorder.records:
+        recorder.store(key, model, assembled)
+
+def _record_token_usage(phase, response_json):
+    usage = response_json.get("usageMetadata", {})
+    for kind, field in (("prompt", "promptTokenCount"), ("cached", "cachedContentTokenCount"),
+                        ("output", "candidatesTokenCount"), ("thinking", "thoughtsTokenCount")):
+        if usage.get(field):
+            metrics.LLM_TOKENS.inc(usage[field], phase=phase, kind=kind)
+
+def _post_generate_content(url, headers, payload, context_cache=None):
+    # Reference the cached prefix and send only the newer messages
+    cached_name = None
+    if context_cache:
+        cached_name, uncached_messages = context_cache.split(payload["contents"])
+    if cached_name:
+        cached_payload = dict(payload, contents=uncached_messages, cachedContent=cached_name)
+        cached_payload.pop("tools", None)
+        response = requests.post(url = url, headers = headers, data = encode_request(cached_payload))
+        if response.ok:
+            return response.json()
+        if not _is_cache_rejection(response):
+            # Rate limits and server errors go through the normal error path instead of doubling traffic
+            response.raise_for_status()
+        # Cache expired or was rejected, fall back to the full request
+        context_cache.invalidate()
+
+    response = requests.post(url = url, headers = headers, data = encode_request(payload))
+    response.raise_for_status()
+    return response.json()
+
+def _is_cache_rejection(response) -> bool:
+    """True for 4xx responses that blame the cachedContent reference (expired, deleted or not permitted)."""
+    if response.status_code not in (400, 403, 404):
+        return False
+    return "cachedcontent" in response.text.lower()
+
 def prepare_message(user_message = "", model_message = "", tool_calls = [], tools_response= []):
     
     if user_message:
@@ -93,62 +236,127 @@ def convert_response_to_json(content):
         print(f"Content type: {type(content)}, Content: {str(content)[:200]}")
         raise
 
-def generate_response_with_fn_calls(conv_messsages, event_handler=None, max_iterations=None):
+def _call_tool(name, args):
+    # Tool calls share upstream capacity by priority class, like LLM calls
+    with scheduled("tool"):
+        started = time.monotonic()
+        try:
+            result = available_functions[name](**args)
+        except Exception:
+            metrics.TOOL_CALLS.inc(tool=name, outcome="error")
+            raise
+        finally:
+            metrics.TOOL_SECONDS.observe(time.monotonic() - started, tool=name)
+    # Tools report most failures as "Error ..." strings rather than raising
+    outcome = "error" if isinstance(result, str) and result.startswith("Error") else "ok"
+    metrics.TOOL_CALLS.inc(tool=name, outcome=outcome)
+    return result
+
+def generate_response_with_fn_calls(conv_messsages, event_handler=None, max_iterations=None, budget=None, fetched_urls=None):
     config = get_config()
-    max_iterations = max_iterations or config.MAX_TOOL_ITERATIONS
+    max_iterations = max_iterations or (budget.max_iterations if budget else None) or config.MAX_TOOL_ITERATIONS
     iteration_count = 0
+    finished = False
+    stop_reason = None
+    tools = [web_search_dec, arxiv_search_dec, arxiv_papers_dec, multi_search_dec, fetch_url_dec]
+    if config.ENABLE_LOCAL_INDEX:
+        tools.append(local_search_dec)
+    # Pure replay never reaches the API, so there is nothing to cache server-side
+    # and batch requests are answered offline, long after a cache would be useful
+    use_context_cache = config.ENABLE_CONTEXT_CACHE and config.LLM_CACHE_MODE != "replay" and not active_batch()
+    context_cache = ContextCache(config.GEMINI_MODEL, tools) if use_context_cache else None
+    # Each turn re-sends the whole history; encode every message only once
+    if not isinstance(conv_messsages, Conversation):
+        conv_messsages = Conversation(conv_messsages)
 
-    while iteration_count < max_iterations:
-        iteration_count += 1
-        response = generate_response(
-            messages=conv_messsages,
-            thinking_level="medium",
-            tools = [web_search_dec, arxiv_search_dec, fetch_url_dec]
-            )
+    content = None
+    try:
+        while iteration_count < max_iterations:
+            if budget and budget.cancelled:
+                stop_reason = budget.stop_reason()
+                break
+            iteration_count += 1
+            response = generate_response(
+                messages=conv_messsages,
+                thinking_level="medium",
+                tools = tools,
+                context_cache=context_cache
+                )
+            if budget:
+                budget.record_response(response)
 
-        content = extract_content(response)
-
-        if type(content) == list and content:
-            conv_messsages.append(prepare_message(tool_calls = content))
-            results = []
-            for fn in content:
-                fn_call = fn["functionCall"]
-                if fn_call["name"] in available_functions:
-                    print(f"Calling {fn_call["name"]} with arguments {fn_call["args"]}")
-                    fn_result = available_functions[fn_call["name"]](**fn_call["args"])
-                    print("Results from fn: ", fn_result[:100])
-
-                    # Emit tool call event if handler provided
-                    if event_handler:
-                        event_handler.emit_tool_call(
-                            fn_call["name"],
-                            fn_call["args"],
-                            fn_result
-                        )
-
-                    # add the tool result to the messages
-                    results.append({
-                        "functionResponse":{
-                            "name": fn_call["name"],
-                            "response": {"result":fn_result}
-                        }
-                    })
-
-            if results:
-                conv_messsages.append(prepare_message(tools_response = results))
-        else:
-            print("\nFinal Message Generated")
-            break
-
-    if iteration_count >= max_iterations:
-        print(f"\nWarning: Reached maximum tool iterations ({max_iterations})")
-        # Force a final response without tools to get the summary
-        print("Requesting final summary without additional tool calls...")
-        final_response = generate_response(
-            messages=conv_messsages,
-            thinking_level="medium",
-            tools=[]  # No tools - force text response
-        )
-        content = extract_content(final_response)
+            content = extract_content(response)
+
+            if type(content) == list and content:
+                conv_messsages.append(prepare_message(tool_calls = content))
+                results = []
+                turn_calls = []
+                for fn in content:
+                    fn_call = fn["functionCall"]
+                    if fn_call["name"] in available_functions:
+                        print(f"Calling {fn_call["name"]} with arguments {fn_call["args"]}")
+                        fn_result = _call_tool(fn_call["name"], fn_call["args"])
+                        print("Results from fn: ", fn_result[:100])
+
+                        # Emit tool call event if handler provided
+                        if event_handler:
+                            event_handler.emit_tool_call(
+                                fn_call["name"],
+                                fn_call["args"],
+                                fn_result
+                            )
+
+                        turn_calls.append((fn_call["name"], fn_call["args"], fn_result))
+                        if fetched_urls is not None and fn_call["name"] == "fetch_url" and not fn_result.startswith("Error"):
+                            fetched_urls.append(fn_call["args"].get("url", ""))
+
+                        # add the tool result to the messages
+                        results.append({
+                            "functionResponse":{
+                                "name": fn_call["name"],
+                                "response": {"result":fn_result}
+                            }
+                        })
+
+                if results:
+                    conv_messsages.append(prepare_message(tools_response = results))
+
+                # Move the cached prefix forward once enough history has accumulated
+                if context_cache:
+                    context_cache.update(conv_messsages, response)
+
+                # Wrap up early on deadlines, exhausted run budget or no-progress loops
+                if budget:
+                    budget.record_turn(turn_calls)
+                    stop_reason = budget.stop_reason()
+                    if stop_reason:
+                        break
+            else:
+                print("\nFinal Message Generated")
+                finished = True
+                break
+
+        metrics.ANGLE_ITERATIONS.observe(iteration_count)
+        if budget and budget.cancelled and not finished:
+            # Nobody will use the findings, so skip the summary call
+            print(f"\n{stop_reason}")
+            return None
+        if not finished:
+            print(f"\nWarning: {stop_reason or f'Reached maximum tool iterations ({max_iterations})'}")
+            if budget:
+                budget.record_unfinished()
+            # Force a final response without tools to get the summary
+            print("Requesting final summary without additional tool calls...")
+            final_response = generate_response(
+                messages=conv_messsages,
+                thinking_level="medium",
+                tools=[]  # No tools - force text response
+            )
+            if budget:
+                budget.record_response(final_response)
+            content = extract_content(final_response)
+    finally:
+        if context_cache:
+            context_cache.delete()
 
     return content
\ No newline at end of file
@@ -0,0 +1,401 @@
+"""SQLite-backed research job queue consumed by headless worker processes."""
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from dataclasses import asdict
+from enum import Enum
+from pathlib import Path
+from typing import Optional
+
+from config import get_config, ConfigurationError
+from events import WorkflowEventHandler, PhaseEvent, ToolCallEvent
+
+HEADLESS_CLARIFICATION = "No clarification is available. Proceed with your stated assumptions."
+
+
+class JobStatus(Enum):
+    """Research job status."""
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class JobQueue:
+    """
+    Research jobs, their progress events and reports in one SQLite file.
+
+    Any number of processes may submit, claim and poll concurrently: claims
+    run inside an immediate transaction so each job goes to exactly one
+    worker. A running job holds a lease that its worker keeps renewing; only
+    jobs whose lease has expired (the worker died) are put back on the queue.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path or get_config().JOB_QUEUE_PATH)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            # config holds per-job configuration overrides as JSON
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, query TEXT NOT NULL, clarification TEXT, status TEXT NOT NULL, "
+                "worker TEXT, created_at REAL, started_at REAL, finished_at REAL, report TEXT, error TEXT, "
+                "config TEXT, lease_expires_at REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS events ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, job_id TEXT NOT NULL, kind TEXT NOT NULL, "
+                "payload TEXT NOT NULL, created_at REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS events_job ON events (job_id, id)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def submit(self, query: str, user_clarification: Optional[str] = None,
+               config_overrides: Optional[dict] = None) -> str:
+        """Queue a research job and return its id; config_overrides are applied to the worker's Config for this job."""
+        if config_overrides:
+            # Reject unknown settings at submit time rather than in the worker
+            get_config().with_overrides(**config_overrides)
+        job_id = uuid.uuid4().hex
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, query, clarification, status, created_at, config) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, query, user_clarification, JobStatus.QUEUED.value, time.time(),
+                 json.dumps(config_overrides) if config_overrides else None),
+            )
+        return job_id
+
+    def claim_many(self, worker_id: str, limit: int) -> list:
+        """Claim up to limit queued jobs, oldest first."""
+        jobs = []
+        while len(jobs) < limit:
+            job = self.claim(worker_id)
+            if job is None:
+                break
+            jobs.append(job)
+        return jobs
+
+    def claim(self, worker_id: str, lease_seconds: Optional[float] = None) -> Optional[dict]:
+        """Atomically take the oldest queued job under a lease, or return None if the queue is empty."""
+        lease_seconds = lease_seconds or get_config().JOB_LEASE_SECONDS
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1", (JobStatus.QUEUED.value,)
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            now = time.time()
+            conn.execute(
+                "UPDATE jobs SET status = ?, worker = ?, started_at = ?, lease_expires_at = ? WHERE id = ?",
+                (JobStatus.RUNNING.value, worker_id, now, now + lease_seconds, row["id"]),
+            )
+            conn.execute("COMMIT")
+            return dict(row, status=JobStatus.RUNNING.value, worker=worker_id, started_at=now)
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def complete(self, job_id: str, report: str):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, report = ?, finished_at = ? WHERE id = ?",
+                (JobStatus.COMPLETED.value, report, time.time(), job_id),
+            )
+
+    def fail(self, job_id: str, error: str):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ?",
+                (JobStatus.FAILED.value, error, time.time(), job_id),
+            )
+
+    def renew_lease(self, job_id: str, worker_id: str, lease_seconds: float) -> bool:
+        """Extend the lease of a job this worker is running; False if the job is no longer ours."""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET lease_expires_at = ? WHERE id = ? AND worker = ? AND status = ?",
+                (time.time() + lease_seconds, job_id, worker_id, JobStatus.RUNNING.value),
+            )
+            return cursor.rowcount > 0
+
+    def requeue_stale(self) -> int:
+        """Put running jobs whose lease expired (their worker died) back on the queue; returns how many."""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, worker = NULL, started_at = NULL, lease_expires_at = NULL "
+                "WHERE status = ? AND COALESCE(lease_expires_at, 0) < ?",
+                (JobStatus.QUEUED.value, JobStatus.RUNNING.value, time.time()),
+            )
+            return cursor.rowcount
+
+    def add_event(self, job_id: str, kind: str, payload: dict):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO events (job_id, kind, payload, created_at) VALUES (?, ?, ?, ?)",
+                (job_id, kind, json.dumps(payload, default=str), time.time()),
+            )
+
+    def status(self, job_id: str) -> Optional[dict]:
+        """Return job metadata (without the report body), or None for an unknown id."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT id, query, status, worker, created_at, started_at, finished_at, error, "
+                "report IS NOT NULL AS has_report FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def events(self, job_id: str, after_id: int = 0) -> list:
+        """Return events newer than after_id, oldest first."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, kind, payload, created_at FROM events WHERE job_id = ? AND id > ? ORDER BY id",
+                (job_id, after_id),
+            ).fetchall()
+        return [dict(row, payload=json.loads(row["payload"])) for row in rows]
+
+    def report(self, job_id: str) -> Optional[str]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT report FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return row["report"] if row else None
+
+
+class QueueEventHandler(WorkflowEventHandler):
+    """Headless event handler that persists workflow events to the job queue."""
+
+    def __init__(self, queue: JobQueue, job_id: str):
+        self.queue = queue
+        self.job_id = job_id
+        super().__init__(
+            on_phase_update=self.handle_phase_update,
+            on_tool_call=self.handle_tool_call,
+            on_clarification_needed=self.handle_clarification,
+        )
+
+    def handle_phase_update(self, event: PhaseEvent):
+        self.queue.add_event(self.job_id, "phase", dict(asdict(event), status=event.status.value))
+
+    def handle_tool_call(self, event: ToolCallEvent):
+        self.queue.add_event(self.job_id, "tool_call", asdict(event))
+
+    def handle_clarification(self, questions: str) -> str:
+        # Nobody is attached to answer; continue on the model's own assumptions
+        self.queue.add_event(self.job_id, "clarification", {"questions": questions, "answer": HEADLESS_CLARIFICATION})
+        return HEADLESS_CLARIFICATION
+
+
+def run_worker(queue_path: Optional[str] = None, worker_id: Optional[str] = None, max_jobs: Optional[int] = None,
+               metrics_port_offset: int = 0):
+    """Claim and execute jobs until max_jobs have run (forever when None)."""
+    import metrics
+
+    config = get_config()
+    queue = JobQueue(queue_path)
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    completed = 0
+    # Metrics are per process, so every worker serves its own endpoint
+    metrics.start_metrics_server(metrics_port_offset)
+
+    while max_jobs is None or completed < max_jobs:
+        job = queue.claim(worker_id)
+        if job is None:
+            # Idle workers pick up after crashed ones
+            requeued = queue.requeue_stale()
+            if requeued:
+                print(f"[{worker_id}] Requeued {requeued} jobs with expired leases")
+            else:
+                time.sleep(config.WORKER_POLL_SECONDS)
+            continue
+
+        print(f"[{worker_id}] Running job {job['id']}: {job['query']}")
+        _run_job(queue, job)
+        completed += 1
+
+
+class _LeaseKeeper:
+    """Renews a running job's lease in the background until stopped."""
+
+    def __init__(self, queue: JobQueue, job: dict):
+        config = get_config()
+        self.queue = queue
+        self.job = job
+        self.lease_seconds = config.JOB_LEASE_SECONDS
+        self.interval = config.JOB_HEARTBEAT_SECONDS
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"lease-{job['id'][:8]}", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stopped.set()
+        self._thread.join()
+        return False
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                if not self.queue.renew_lease(self.job["id"], self.job["worker"], self.lease_seconds):
+                    print(f"Lost the lease on job {self.job['id']}")
+                    return
+            except sqlite3.Error as e:
+                print(f"Failed to renew the lease on job {self.job['id']}: {str(e)}")
+
+
+def _run_job(queue: JobQueue, job: dict):
+    with _LeaseKeeper(queue, job):
+        _execute_job(queue, job)
+
+
+def _execute_job(queue: JobQueue, job: dict):
+    from main import run_worklow
+
+    try:
+        overrides = json.loads(job["config"]) if job.get("config") else {}
+        report = run_worklow(
+            job["query"],
+            user_clarification=job["clarification"],
+            event_handler=QueueEventHandler(queue, job["id"]),
+            priority="batch",
+            config=get_config().with_overrides(**overrides) if overrides else None,
+        )
+        queue.complete(job["id"], report)
+    except Exception as e:
+        queue.add_event(job["id"], "error", {"error": str(e), "traceback": traceback.format_exc()})
+        queue.fail(job["id"], str(e))
+
+
+def run_batch(queue_path: Optional[str] = None, max_jobs: Optional[int] = None) -> int:
+    """
+    Claim queued jobs and run them together on the Gemini Batch API.
+
+    Every job runs in its own thread; their LLM calls are pooled into batch
+    jobs, so e.g. Phase 1 of all claimed queries goes out as one batch. Returns
+    the number of jobs processed.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    import contextvars
+    from batch import BatchCollector
+
+    config = get_config()
+    queue = JobQueue(queue_path)
+    worker_id = f"{socket.gethostname()}:{os.getpid()}:batch"
+    jobs = queue.claim_many(worker_id, max_jobs or config.BATCH_MAX_REQUESTS)
+    if not jobs:
+        print("No queued jobs")
+        return 0
+    print(f"[{worker_id}] Running {len(jobs)} jobs through the batch backend")
+
+    with BatchCollector() as collector:
+        # Announce all workflows up front so the first batch waits for every job's Phase 1
+        collector.expect(len(jobs))
+
+        def run_job(job):
+            try:
+                _run_job(queue, job)
+            finally:
+                collector.done()
+
+        with ThreadPoolExecutor(max_workers=len(jobs), thread_name_prefix="batch-workflow") as executor:
+            for job in jobs:
+                executor.submit(contextvars.copy_context().run, run_job, job)
+    print(f"Finished {len(jobs)} jobs in batch jobs {', '.join(collector.jobs) or '(none)'}")
+    return len(jobs)
+
+
+def serve(workers: int, queue_path: Optional[str] = None):
+    """Run N worker processes until interrupted."""
+    config = get_config()
+    requeued = JobQueue(queue_path).requeue_stale()
+    if requeued:
+        print(f"Requeued {requeued} jobs with expired leases")
+
+    processes = [
+        multiprocessing.Process(
+            target=run_worker, args=(queue_path,), kwargs={"metrics_port_offset": i},
+            name=f"research-worker-{i}", daemon=True,
+        )
+        for i in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    print(f"Started {workers} workers on {queue_path or config.JOB_QUEUE_PATH}")
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+
+
+def main():
+    """CLI entry point for the job queue."""
+    parser = argparse.ArgumentParser(description="Research Agent job queue")
+    parser.add_argument("--queue", help="Path to the queue database (default: JOB_QUEUE_PATH)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = commands.add_parser("serve", help="Run worker processes")
+    serve_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+
+    batch_parser = commands.add_parser("batch", help="Run queued jobs together through the Gemini Batch API")
+    batch_parser.add_argument("--jobs", type=int, help="Maximum jobs to claim (default: BATCH_MAX_REQUESTS)")
+
+    submit_parser = commands.add_parser("submit", help="Queue a research query")
+    submit_parser.add_argument("query")
+    submit_parser.add_argument("--clarification")
+    submit_parser.add_argument("--set", action="append", default=[], metavar="NAME=VALUE",
+                               help="Configuration override for this job, e.g. --set GEMINI_MODEL=gemini-2.5-pro")
+
+    for name in ("status", "events", "report"):
+        commands.add_parser(name).add_argument("job_id")
+
+    args = parser.parse_args()
+    try:
+        get_config()
+    except ConfigurationError as e:
+        print(f"Configuration Error: {e}")
+        return
+
+    if args.command == "serve":
+        serve(args.workers, args.queue)
+        return
+    if args.command == "batch":
+        run_batch(args.queue, args.jobs)
+        return
+
+    queue = JobQueue(args.queue)
+    if args.command == "submit":
+        overrides = dict(item.split("=", 1) for item in args.set if "=" in item)
+        try:
+            print(queue.submit(args.query, args.clarification, overrides))
+        except ConfigurationError as e:
+            print(f"Configuration Error: {e}")
+    elif args.command == "status":
+        print(json.dumps(queue.status(args.job_id), indent=2))
+    elif args.command == "events":
+        for event in queue.events(args.job_id):
+            print(json.dumps(event))
+    elif args.command == "report":
+        print(queue.report(args.job_id) or "")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""Dynamic task graph for running workflow steps as soon as their dependencies finish."""
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+
+@dataclass(slots=True)
+class TaskNode:
+    """One unit of work in a TaskGraph and its timings (monotonic seconds)."""
+    name: str
+    fn: Callable[[], Any]
+    deps: tuple
+    on_done: Optional[Callable[[Any], None]] = None
+    result: Any = None
+    error: Optional[BaseException] = None
+    added_at: float = 0.0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+
+class TaskGraph:
+    """
+    Run callables on a thread pool as soon as the nodes they depend on finish.
+
+    Nodes may be added while the graph runs - typically from an on_done
+    callback - so work discovered midway (e.g. gap-filling research angles)
+    joins the same schedule. run() blocks until the graph drains. After the
+    first failure no new nodes start, and run() re-raises it once the
+    running ones have finished.
+    """
+
+    def __init__(self, max_workers: int):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="graph")
+        self._nodes = {}
+        self._waiting = []
+        self._running = 0
+        self._error: Optional[BaseException] = None
+        self._condition = threading.Condition()
+        self.started_at = time.monotonic()
+
+    def add(self, name: str, fn: Callable[[], Any], deps: tuple = (),
+            on_done: Optional[Callable[[Any], None]] = None) -> str:
+        """Add a node; deps must name nodes already in the graph. Returns the node name."""
+        with self._condition:
+            if name in self._nodes:
+                raise ValueError(f"Duplicate task name: {name}")
+            missing = [dep for dep in deps if dep not in self._nodes]
+            if missing:
+                raise ValueError(f"Unknown dependencies for {name}: {missing}")
+            node = TaskNode(name, fn, tuple(deps), on_done, added_at=time.monotonic())
+            self._nodes[name] = node
+            self._waiting.append(node)
+            self._start_ready()
+        return name
+
+    def result(self, name: str) -> Any:
+        return self._nodes[name].result
+
+    def _start_ready(self):
+        # Called with the condition held
+        if self._error is not None:
+            self._waiting.clear()
+            return
+        for node in list(self._waiting):
+            if all(self._nodes[dep].finished_at is not None for dep in node.deps):
+                self._waiting.remove(node)
+                self._running += 1
+                # Nodes run in a copy of the adding thread's context (run-scoped caches etc.)
+                self._executor.submit(contextvars.copy_context().run, self._execute, node)
+
+    def _execute(self, node: TaskNode):
+        node.started_at = time.monotonic()
+        try:
+            node.result = node.fn()
+            if node.on_done:
+                node.on_done(node.result)
+        except BaseException as e:
+            node.error = e
+        node.finished_at = time.monotonic()
+        with self._condition:
+            self._running -= 1
+            if node.error is not None and self._error is None:
+                self._error = node.error
+            self._start_ready()
+            self._condition.notify_all()
+
+    def run(self):
+        """Block until every node has finished, then raise the first failure, if any."""
+        try:
+            with self._condition:
+                while self._running or self._waiting:
+                    self._condition.wait()
+                if self._error is not None:
+                    raise self._error
+        finally:
+            self._executor.shutdown(wait=False)
+
+    def timings(self) -> list:
+        """Per-node timings in seconds relative to graph creation, in the order nodes were added."""
+        def offset(moment):
+            return None if moment is None else round(moment - self.started_at, 3)
+
+        return [
+            {
+                "name": node.name,
+                "deps": list(node.deps),
+                "added": offset(node.added_at),
+                "started": offset(node.started_at),
+                "finished": offset(node.finished_at),
+                "seconds": None if node.started_at is None or node.finished_at is None
+                else round(node.finished_at - node.started_at, 3),
+            }
+            for node in self._nodes.values()
+        ]
+
+    def critical_path(self) -> list:
+        """Chain of nodes that determined when the graph finished, first node first.
+
+        Starting from the last node to finish, repeatedly follow the dependency
+        that finished last - the one the node was actually waiting for.
+        """
+        finished = [node for node in self._nodes.values() if node.finished_at is not None]
+        if not finished:
+            return []
+        node = max(finished, key=lambda n: n.finished_at)
+        path = [node.name]
+        while node.deps:
+            node = max((self._nodes[dep] for dep in node.deps), key=lambda n: n.finished_at)
+            path.append(node.name)
+        return list(reversed(path))